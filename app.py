@@ -4,18 +4,22 @@
 # Run: streamlit run app.py
 
 import streamlit as st
-import pandas as pd
-import time
-import pdfplumber
-import re
-import requests
-import plotly.graph_objects as go
 import base64
 from datetime import datetime
-from fpdf import FPDF
-from PIL import Image
-import pytesseract
 import urllib.parse
+import uuid
+from quoteguard.engine import REGIONS, DEFAULT_PRICE, RISK_THRESHOLD, IngestLimit, extract_details, calculate_smart_fair_price, check_siret, trust_score, render_report, market_index, record_audit
+from quoteguard.charts import create_gauge, create_donut, create_region_bars
+from quoteguard.comparison import compare_regions
+from quoteguard.translations import TRANSLATIONS
+from quoteguard import metrics
+from quoteguard.pipeline import Pipeline
+from quoteguard.similarity import diff as diff_versions, summarize
+from quoteguard.jobs import DONE, QUEUED, QueueFull, extract_job, get_queue
+from quoteguard.store import get_store
+
+# Heavy libraries (plotly, fpdf, pdfplumber, PIL, pytesseract, requests) are imported
+# on first use, so the landing page renders without loading them.
 
 # ---------- CONFIG ----------
 st.set_page_config(
@@ -25,18 +29,27 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+metrics.configure_from_env()
+
 # ---------- SESSION STATE ----------
-if 'history' not in st.session_state:
-    st.session_state.history = []
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'history_page' not in st.session_state:
+    st.session_state.history_page = 0
 if 'demo_mode' not in st.session_state:
     st.session_state.demo_mode = False
 
+HISTORY_PAGE_SIZE = 5
+
 def activate_demo():
     st.session_state.demo_mode = True
 
-def add_to_history(project, price, score):
-    st.session_state.history.insert(0, {"time": datetime.now().strftime("%H:%M"), "project": project, "price": price, "score": score})
-    st.session_state.history = st.session_state.history[:5]
+def add_to_history(audit):
+    # Queued for the background writer; shows up in the sidebar from the next rerun
+    record_audit({**audit, "session": st.session_state.session_id})
+
+def turn_history_page(step):
+    st.session_state.history_page = max(0, st.session_state.history_page + step)
 
 # ---------- CSS ----------
 st.markdown("""
@@ -77,123 +90,8 @@ html, body, [class*="css"] { font-family: 'Plus Jakarta Sans', sans-serif; }
 </style>
 """, unsafe_allow_html=True)
 
-# ---------- REGIONS & TRANSLATIONS ----------
-REGIONS = {
-    "Paris & Île-de-France": 1.0,
-    "Lyon / Rhône-Alpes": 0.90,
-    "Nice / Côte d'Azur": 0.95,
-    "Bordeaux / Gironde": 0.85,
-    "Marseille / PACA": 0.85,
-    "Lille / Nord": 0.80,
-    "Rest of France (Rural)": 0.70
-}
-
-TRANSLATIONS = {
-    "English": {
-        "role": "National Verification Engine",
-        "bio": "Independent pricing verification using Smart Keyword Detection.",
-        "wa_button": "👉 Contact Expert",
-        "title": "QuoteGuard",
-        "subtitle": "Smart Renovation Audit & Price Check 🇫🇷",
-        "loc_label": "📍 Region / City",
-        "proj_label": "Project Category",
-        "upload_label": "Upload Quote (PDF, JPG, PNG)",
-        "prog_init": "Reading Document...",
-        "prog_check": "🔎 Detecting Items (OCR)...",
-        "prog_done": "✅ Smart Analysis Complete",
-        "verdict": "Trust Score",
-        "metric_quote": "Quoted Price",
-        "metric_fair": "Smart Estimate",
-        "metric_markup": "vs Estimate",  # ADDED MISSING KEY
-        "chart_title": "Fairness Gauge",
-        "risk_high": "HIGH RISK",
-        "risk_safe": "FAIR PRICE",
-        "alert_title": "⚠️ Potential overcharge detected:",
-        "alert_btn": "🚨 Speak with an Expert",
-        "safe_title": "✅ Excellent Price! You are saving money.",
-        "safe_btn": "💬 Confirm with Expert",
-        "nego_title": "💡 Negotiation Strategy",
-        "nego_desc": "We found these items in your quote. Use this logic:",
-        "unknown": "❓ MANUAL CHECK REQ.",
-        "addr_missing": "Address not detected",
-        "active": "✅ LEGALLY ACTIVE",
-        "closed": "❌ COMPANY CLOSED",
-        "projects": {"General 🔨": "General 🔨", "Plumbing 🚿": "Plumbing 🚿", "Electricity ⚡": "Electricity ⚡"},
-        "disclaimer": "Estimates based on detected keywords and regional averages.",
-        "upgrade_title": "Upgrade to Expert Review",
-        "price_free": "Standard",
-        "price_paid": "Expert Audit",
-        "feat_1": "AI Item Detection",
-        "feat_2": "Regional Price Check",
-        "feat_4": "Human Expert Review",
-        "feat_5": "Negotiation Support",
-        "cta_free": "Current Plan",
-        "cta_paid": "Buy Audit - €29",
-        "rec": "RECOMMENDED",
-        "demo_btn": "⚡ Try Demo Quote",
-        "live_update": "LIVE MARKET: Inflation +2.1%",
-        "hist_title": "🕒 Recent Scans",
-        "email_btn": "📧 Email Report",
-        "feedback": "Was this helpful?",
-        "stripe_url": "https://buy.stripe.com/test_12345",
-        "detected_items": "🔍 AI Detected Items:",
-        "match_title": "👷 Need a better price?",
-        "match_btn": "Get 3 Verified Quotes"
-    },
-    "Français": {
-        "role": "Expertise & Audit National",
-        "bio": "Vérification intelligente des prix via détection de mots-clés.",
-        "wa_button": "👉 Contacter Expert",
-        "title": "QuoteGuard",
-        "subtitle": "Audit Intelligent de Devis Travaux 🇫🇷",
-        "loc_label": "📍 Région / Ville",
-        "proj_label": "Catégorie du Projet",
-        "upload_label": "Analyser Devis (PDF, JPG, PNG)",
-        "prog_init": "Lecture du document...",
-        "prog_check": "🔎 Détection des travaux (OCR)...",
-        "prog_done": "✅ Analyse Intelligente Terminée",
-        "verdict": "Score de Confiance",
-        "metric_quote": "Montant du Devis",
-        "metric_fair": "Estimation Intelligente",
-        "metric_markup": "Écart vs Est.",  # ADDED MISSING KEY
-        "chart_title": "Jauge de Confiance",
-        "risk_high": "RISQUE ÉLEVÉ",
-        "risk_safe": "PRIX CORRECT",
-        "alert_title": "⚠️ Écart critique détecté :",
-        "alert_btn": "🚨 Parler à un Expert",
-        "safe_title": "✅ Excellent Prix ! Vous économisez.",
-        "safe_btn": "💬 Valider ce devis",
-        "nego_title": "💡 Stratégie de Négociation",
-        "nego_desc": "Voici les éléments détectés. Utilisez cet argumentaire :",
-        "unknown": "❓ VÉRIFICATION MANUELLE",
-        "addr_missing": "Adresse non détectée",
-        "active": "✅ SOCIÉTÉ ACTIVE (INSEE)",
-        "closed": "❌ SOCIÉTÉ RADIÉE / FERMÉE",
-        "projects": {"General 🔨": "Rénovation Globale 🔨", "Plumbing 🚿": "Plomberie 🚿", "Electricity ⚡": "Électricité ⚡"},
-        "disclaimer": "Estimations basées sur les mots-clés détectés et moyennes régionales.",
-        "upgrade_title": "Passer à l'Audit Expert",
-        "price_free": "Standard",
-        "price_paid": "Audit Expert",
-        "feat_1": "Détection IA des Travaux",
-        "feat_2": "Vérification Prix Régional",
-        "feat_4": "Revue par un Expert Humain",
-        "feat_5": "Assistance Négociation",
-        "cta_free": "Plan Actuel",
-        "cta_paid": "Acheter Audit - 29€",
-        "rec": "RECOMMANDÉ",
-        "demo_btn": "⚡ Essayer la Démo",
-        "live_update": "MARCHÉ EN DIRECT : Inflation +2,1%",
-        "hist_title": "🕒 Historique Récent",
-        "email_btn": "📧 Envoyer par Email",
-        "feedback": "Cet audit a-t-il été utile ?",
-        "stripe_url": "https://buy.stripe.com/test_12345",
-        "detected_items": "🔍 Travaux Détectés par l'IA :",
-        "match_title": "👷 Besoin d'un meilleur prix ?",
-        "match_btn": "Recevoir 3 Devis Vérifiés"
-    }
-}
-
 # ---------- HELPERS ----------
+@st.cache_data
 def get_img_as_base64(path):
     try:
         with open(path, "rb") as f:
@@ -201,146 +99,6 @@ def get_img_as_base64(path):
     except Exception:
         return None
 
-def extract_data(file):
-    text = ""
-    try:
-        if file.type == "application/pdf":
-            with pdfplumber.open(file) as pdf:
-                for p in pdf.pages:
-                    text += p.extract_text() or ""
-        else:
-            image = Image.open(file)
-            text = pytesseract.image_to_string(image)
-            
-        price = re.search(r"(Total|Montant|TTC).*?(\d+[\s\d]*[\.,]\d{2})", text, re.I)
-        siret = re.search(r"\b\d{14}\b", text.replace(" ", ""))
-        amount = float(price.group(2).replace(" ", "").replace(",", ".")) if price else 0.0
-        
-        return amount, (siret.group(0) if siret else None), text
-    except Exception as e:
-        return 0.0, None, ""
-
-def calculate_smart_fair_price(text, region_multiplier):
-    text = text.lower()
-    items_found = []
-    running_total = 0
-    keywords = {
-        "wc": {"cost": 800, "name": "Toilette / WC"},
-        "toilet": {"cost": 800, "name": "Toilette / WC"},
-        "lavabo": {"cost": 600, "name": "Lavabo / Sink"},
-        "douche": {"cost": 1500, "name": "Douche / Shower"},
-        "baignoire": {"cost": 1800, "name": "Baignoire / Bath"},
-        "chauffe-eau": {"cost": 1200, "name": "Chauffe-eau / Heater"},
-        "peinture": {"cost": 2000, "name": "Forfait Peinture"},
-        "carrelage": {"cost": 1500, "name": "Carrelage / Tiling"},
-        "tableau": {"cost": 1500, "name": "Tableau Élec / Panel"},
-        "cuisine": {"cost": 4000, "name": "Cuisine / Kitchen"},
-        "fenêtre": {"cost": 1000, "name": "Fenêtre / Window"},
-        "porte": {"cost": 800, "name": "Porte / Door"}
-    }
-    for key, data in keywords.items():
-        if key in text and data['name'] not in [i['name'] for i in items_found]:
-            local_cost = data['cost'] * region_multiplier
-            items_found.append({"name": data['name'], "cost": local_cost})
-            running_total += local_cost
-
-    if running_total == 0:
-        running_total = 1500 * region_multiplier
-        items_found.append({"name": "Estimation Standard", "cost": running_total})
-        
-    return running_total, items_found
-
-def check_siret(siret):
-    try:
-        r = requests.get(f"https://recherche-entreprises.api.gouv.fr/search?q={siret}", timeout=10)
-        if r.status_code == 200 and r.json():
-            c = r.json()[0]
-            status = "ACTIVE" if c.get("etat_administratif") == "A" else "CLOSED"
-            addr = c.get("first_matching_etablissement", {}).get("address", "")
-            return c.get("label", "Unknown"), status, addr
-    except Exception:
-        pass
-    return "Unknown", "CHECK", ""
-
-# ---------- NEW: GAUGE CHART ----------
-def create_gauge(score, title):
-    fig = go.Figure(go.Indicator(
-        mode = "gauge+number",
-        value = score,
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        title = {'text': title, 'font': {'size': 24}},
-        gauge = {
-            'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
-            'bar': {'color': "#3b82f6"},
-            'bgcolor': "white",
-            'borderwidth': 2,
-            'bordercolor': "gray",
-            'steps': [
-                {'range': [0, 50], 'color': '#ef4444'},
-                {'range': [50, 75], 'color': '#f59e0b'},
-                {'range': [75, 100], 'color': '#22c55e'}],
-            'threshold': {
-                'line': {'color': "black", 'width': 4},
-                'thickness': 0.75,
-                'value': score}}))
-    fig.update_layout(height=250, margin=dict(l=20, r=20, t=50, b=20), paper_bgcolor="rgba(0,0,0,0)")
-    return fig
-
-# ---------- NEW: DONUT CHART ----------
-def create_donut(items, labor_est):
-    labels = [i['name'] for i in items] + ["Main d'oeuvre (Est.)"]
-    values = [i['cost'] for i in items] + [labor_est]
-    fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.4)])
-    fig.update_layout(height=250, margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor="rgba(0,0,0,0)", showlegend=False)
-    return fig
-
-def create_pdf(t, project, region, name, status, addr, price, fair, diff, risk, items):
-    def clean_text(text):
-        if not isinstance(text, str): text = str(text)
-        text = text.replace("€", "EUR").replace("•", "-").replace("’", "'").replace("…", "...")
-        return text.encode('latin-1', 'replace').decode('latin-1')
-
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 20)
-    pdf.cell(0, 10, clean_text(t["title"]), ln=True, align="C")
-    pdf.set_font("Arial", "I", 12)
-    pdf.cell(0, 10, clean_text(t["subtitle"]), ln=True, align="C")
-    pdf.line(10, 30, 200, 30)
-    pdf.ln(10)
-    
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, f"DATE: {datetime.now().strftime('%Y-%m-%d')}", ln=True)
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(0, 10, clean_text(f"Region: {region}"), ln=True)
-    pdf.cell(0, 10, clean_text(f"Company: {name} ({status})"), ln=True)
-    pdf.ln(5)
-    
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, "DETECTED ITEMS:", ln=True)
-    pdf.set_font("Arial", "", 10)
-    for i in items:
-        pdf.cell(0, 6, clean_text(f"- {i['name']}: {i['cost']:.0f} EUR"), ln=True)
-    pdf.ln(5)
-
-    pdf.set_fill_color(240, 240, 240)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, "FINANCIAL ANALYSIS", ln=True, fill=True)
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(100, 10, clean_text(t["metric_quote"]), border=1)
-    pdf.cell(0, 10, f"{price:,.2f} EUR", border=1, ln=True)
-    pdf.cell(100, 10, clean_text(t["metric_fair"]), border=1)
-    pdf.cell(0, 10, f"{fair:,.2f} EUR", border=1, ln=True)
-    pdf.ln(5)
-    
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, clean_text(f"VERDICT: {risk}"), ln=True, align="C")
-    
-    pdf.set_y(-30)
-    pdf.set_font("Arial", "I", 8)
-    pdf.multi_cell(0, 5, clean_text(t["disclaimer"]))
-    return pdf.output(dest="S").encode("latin-1")
-
 # ---------- SIDEBAR ----------
 lang = st.sidebar.radio("🌐 Language", ["English", "Français"], horizontal=True)
 t = TRANSLATIONS[lang]
@@ -351,17 +109,31 @@ st.sidebar.caption(t["bio"])
 st.sidebar.link_button(t["wa_button"], "https://wa.me/33759823532")
 
 # HISTORY
-if len(st.session_state.history) > 0:
+history_total = get_store().count(session=st.session_state.session_id)
+if history_total > 0:
+    pages = (history_total - 1) // HISTORY_PAGE_SIZE + 1
+    st.session_state.history_page = min(st.session_state.history_page, pages - 1)
     st.sidebar.markdown("---")
     st.sidebar.markdown(f"**{t['hist_title']}**")
-    for item in st.session_state.history:
+    for item in get_store().query(limit=HISTORY_PAGE_SIZE, offset=st.session_state.history_page * HISTORY_PAGE_SIZE, session=st.session_state.session_id):
         color = "🔴" if item['score'] < 50 else "🟢"
-        st.sidebar.markdown(f"""<div class="history-item">{color} <b>{item['price']:,.0f}€</b> (Score: {item['score']})<br><span style="opacity:0.7">{item['time']}</span></div>""", unsafe_allow_html=True)
+        st.sidebar.markdown(f"""<div class="history-item">{color} <b>{item['price']:,.0f}€</b> (Score: {item['score']})<br><span style="opacity:0.7">{datetime.fromtimestamp(item['ts']).strftime("%H:%M")}</span></div>""", unsafe_allow_html=True)
+    if pages > 1:
+        h1, h2, h3 = st.sidebar.columns([1, 2, 1])
+        h1.button("◀", on_click=turn_history_page, args=(-1,), disabled=st.session_state.history_page == 0, key="hist_prev")
+        h2.caption(f"{st.session_state.history_page + 1} / {pages}")
+        h3.button("▶", on_click=turn_history_page, args=(1,), disabled=st.session_state.history_page >= pages - 1, key="hist_next")
 
 # ---------- MAIN UI ----------
 st.markdown(f'<div class="animate-enter"><p class="title-text">🛡️ {t["title"]}</p></div>', unsafe_allow_html=True)
 st.markdown(f'<div class="animate-enter"><p class="subtitle-text">{t["subtitle"]}</p></div>', unsafe_allow_html=True)
-st.markdown(f"""<div style="text-align:center; margin-bottom:25px;"><span class="live-badge">🔴 {t['live_update']}</span></div>""", unsafe_allow_html=True)
+market_delta = market_index()
+if market_delta is None:
+    live_update = t["live_update_none"]
+else:
+    delta_txt = f"{market_delta:+.1f}%"
+    live_update = t["live_update"].format(delta=delta_txt if lang == "English" else delta_txt.replace(".", ","))
+st.markdown(f"""<div style="text-align:center; margin-bottom:25px;"><span class="live-badge">🔴 {live_update}</span></div>""", unsafe_allow_html=True)
 
 c1, c2 = st.columns(2)
 region = c1.selectbox(t["loc_label"], list(REGIONS.keys()))
@@ -369,44 +141,117 @@ project = c2.selectbox(t["proj_label"], list(t["projects"].values()))
 file = st.file_uploader(t["upload_label"], type=["pdf", "jpg", "jpeg", "png"])
 
 # ---------- LOGIC ----------
+# Progress bar position reached when each stage completes; text extraction fills 5-80% page by page
+STAGE_PROGRESS = {"parse": (85, "prog_check"), "dedup": (90, "prog_check"), "siret_lookup": (100, "prog_done")}
+JOB_POLL_SECONDS = 0.5
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(job_id):
+    # Re-runs on its own while the job works; the full page reruns once it is finished
+    queue = get_queue()
+    job = queue.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    done, total = job.progress
+    if job.status == QUEUED:
+        st.progress(0, t["prog_queued"].format(ahead=queue.position(job)))
+    elif job.stage in STAGE_PROGRESS:
+        pct, key = STAGE_PROGRESS[job.stage]
+        st.progress(pct, t[key])
+    elif total:
+        st.progress(5 + int(75 * done / total), f"{t['prog_init']} ({done}/{total})")
+    else:
+        st.progress(5, t["prog_init"])
+
+@st.fragment(run_every=2 * JOB_POLL_SECONDS)
+def wait_for_slot():
+    if get_queue().has_room():
+        st.rerun()
+    st.warning(t["queue_full"])
+
+def start_extract_job(file, file_key):
+    """Return the background job extracting this upload, submitting it if needed (None when the queue is full)."""
+    queue = get_queue()
+    pending = st.session_state.get("job")
+    job = queue.get(pending[1]) if pending and pending[0] == file_key else None
+    if job is None:
+        queue.cancel_owner(st.session_state.session_id)    # a new upload replaces the one still being read
+        try:
+            job = queue.submit(st.session_state.session_id, extract_job, file.getvalue(), file.type)
+        except QueueFull:
+            return None
+        st.session_state.job = (file_key, job.id)
+    return job
+
+if not file and "job" in st.session_state:
+    del st.session_state.job
+    get_queue().cancel_owner(st.session_state.session_id)    # upload removed before it was read
+
 if file or st.session_state.demo_mode:
+    pipe = Pipeline(st.session_state.setdefault("pipeline", {}))
     if file:
-        bar = st.progress(0, t["prog_init"])
-        time.sleep(0.4)
-        price, siret, full_text = extract_data(file)
-        bar.progress(50, t["prog_check"])
-        name, status, addr = ("Unknown", t["unknown"], "")
-        if siret: name, status, addr = check_siret(siret)
-        bar.progress(100, t["prog_done"])
-        time.sleep(0.2)
-        bar.empty()
+        # file_id changes on every new upload, even of identical bytes; the disk cache covers re-uploads
+        file_key = (file.file_id, file.size)
+        if not pipe.cached("extract", file_key):
+            job = start_extract_job(file, file_key)
+            if job is None:
+                wait_for_slot()
+                st.stop()
+            if not job.done:
+                job_progress(job.id)
+                st.stop()
+            del st.session_state.job
+            if job.status != DONE:
+                e = job.exception
+                st.error(t["too_large"][e.limit].format(value=e.value, maximum=e.maximum) if isinstance(e, IngestLimit) else t["job_failed"])
+                st.stop()
+            details, company, previous = job.result
+            pipe.put("extract", file_key, details, job.finished - job.started)
+            if details["siret"]: pipe.put("company", details["siret"], company, job.timings.get("siret_lookup"))
+            pipe.put("previous", file_key, previous)
+        details = pipe.run("extract", file_key, extract_details, file)
+        price, siret, full_text = details["amount"], details["siret"], details["text"]
+        line_items = details["parsed"]["items"]
+        company = pipe.run("company", siret, check_siret, siret) if siret else None
+        previous = pipe.get("previous", file_key)
+        changes = pipe.run("changes", file_key, lambda: diff_versions(previous.fields, summarize(details, company))) if previous else []
+        # labels are applied after memoization, so a language switch doesn't trigger a new lookup
+        name, status, addr = company or ("Unknown", t["unknown"], "")
     else:
         st.info("⚡ DEMO MODE: Simulating Quote...")
-        time.sleep(1.0)
+        file_key = "demo"
         price = 18500.0
         full_text = "Devis: Peinture, Cuisine, Electricité, Salle de Bain (Douche, Lavabo, WC)"
+        line_items = []
+        previous, changes = None, []
         name = "Renov' Smart SAS"
         status = t["active"]
         addr = "Paris"
 
-    if price == 0: price = 1500.0
+    if price == 0: price = DEFAULT_PRICE
     
     multiplier = REGIONS[region]
-    fair, detected_items = calculate_smart_fair_price(full_text, multiplier)
+    with metrics.stage("scoring"):
+        fair, detected_items = pipe.run("fair_price", (file_key, region), calculate_smart_fair_price, full_text, multiplier, line_items, region)
 
-    # Calculate Trust Score (0-100)
-    diff = price - fair
-    markup = int(((price - fair) / fair) * 100)
-    score = max(0, min(100, 100 - markup))
+        # Calculate Trust Score (0-100)
+        diff, markup, score = pipe.run("score", (price, fair), trust_score, price, fair)
     
-    risk = t["risk_high"] if score < 60 else t["risk_safe"]
+    risk = t["risk_high"] if score < RISK_THRESHOLD else t["risk_safe"]
     
-    if not st.session_state.demo_mode: add_to_history(project, price, score)
+    # One audit row per uploaded quote and region, however often widgets rerun the page
+    recorded = st.session_state.setdefault("recorded", set())
+    if not st.session_state.demo_mode and (file_key, region) not in recorded:
+        recorded.add((file_key, region))
+        add_to_history({"quote_hash": details["quote_hash"], "siret": siret, "company": name, "region": region, "project": project,
+                        "price": price, "fair": fair, "score": score, "items": detected_items, "timings": pipe.timings})
 
     # 1. SCORE DASHBOARD
     g1, g2 = st.columns([1.5, 1])
     with g1:
-        st.plotly_chart(create_gauge(score, t["verdict"]), use_container_width=True)
+        with metrics.stage("chart_build", chart="gauge"):
+            gauge = pipe.run("gauge", (score, t["verdict"]), create_gauge, score, t["verdict"])
+        st.plotly_chart(gauge, use_container_width=True)
     with g2:
         st.metric(t["metric_quote"], f"€{price:,.0f}", f"{markup}% {t['metric_markup']}", delta_color="inverse")
         st.metric(t["metric_fair"], f"€{fair:,.0f}", "Smart Estimate")
@@ -424,15 +269,36 @@ if file or st.session_state.demo_mode:
     with c_list:
         st.markdown(f"**{t['detected_items']}**")
         for item in detected_items:
-            st.markdown(f"• {item['name']} (~{item['cost']:.0f}€)")
+            quoted = f" · {t['quoted']} {item['quoted']:.0f}€" if item.get("quoted") else ""
+            st.markdown(f"• {item['name']} (~{item['cost']:.0f}€{quoted})")
     with c_chart:
-         st.plotly_chart(create_donut(detected_items, fair*0.3), use_container_width=True)
+        with metrics.stage("chart_build", chart="donut"):
+            donut = pipe.run("donut", (file_key, region), create_donut, detected_items, fair*0.3)
+        st.plotly_chart(donut, use_container_width=True)
+
+    # 3b. ALL REGIONS AT ONCE
+    with st.expander(t["compare_title"]):
+        regions_table = pipe.run("regions", (file_key, price), compare_regions, detected_items, price)
+        with metrics.stage("chart_build", chart="regions"):
+            bars = pipe.run("region_bars", (file_key, price, region), create_region_bars, regions_table, price, region)
+        st.plotly_chart(bars, use_container_width=True)
+        shown = regions_table[["fair", "diff", "markup", "score"]].set_axis(t["compare_cols"], axis=1)
+        st.dataframe(shown, use_container_width=True)
 
     st.markdown(f"**🏢 {name}**")
     st.caption(status)
 
+    if previous:
+        st.info(t["seen_before"].format(similarity=previous.similarity, date=datetime.fromtimestamp(previous.ts).strftime("%d/%m/%Y")))
+        with st.expander(t["seen_changes"]):
+            if not changes:
+                st.caption(t["seen_same"])
+            fmt = lambda v: "—" if v is None else f"{v:,.2f}€" if isinstance(v, (int, float)) else str(v)
+            for field, old, new in changes:
+                st.markdown(f"• **{t['diff_fields'].get(field, field)}**: {fmt(old)} → {fmt(new)}")
+
     # 4. LEAD GEN (If Score is Low)
-    if score < 60:
+    if score < RISK_THRESHOLD:
         st.markdown(f"""
         <div style="background:#fff7ed; border:1px solid #f97316; padding:15px; border-radius:10px; text-align:center; margin-top:20px;">
             <h4 style="color:#c2410c; margin:0;">{t['match_title']}</h4>
@@ -444,8 +310,9 @@ if file or st.session_state.demo_mode:
     # ACTIONS
     st.markdown("---")
     c_act1, c_act2 = st.columns(2)
-    pdf_data = create_pdf(t, project, region, name, status, addr, price, fair, diff, risk, detected_items)
-    c_act1.download_button(label="📄 " + ("Download PDF" if lang == "English" else "Télécharger PDF"), data=pdf_data, file_name="QuoteGuard_Audit.pdf", mime="application/pdf")
+    # The report is only rendered when the button is clicked (and cached by its content); callable data needs Streamlit 1.52+
+    report_args = (t, project, region, name, status, addr, price, fair, diff, risk, detected_items)
+    c_act1.download_button(label="📄 " + ("Download PDF" if lang == "English" else "Télécharger PDF"), data=lambda: render_report(*report_args), file_name="QuoteGuard_Audit.pdf", mime="application/pdf")
     
     subject = urllib.parse.quote("Audit QuoteGuard")
     body = urllib.parse.quote(f"Price: {price}EUR\nFair: {fair}EUR")
@@ -0,0 +1 @@
+# QuoteGuard – benchmark and load-test tooling (not imported by the app)
@@ -0,0 +1,144 @@
+# ==============================
+# QuoteGuard – Synthetic Quote Corpus
+# ==============================
+# Run: python -m bench.corpus --out bench/corpus --count 30 --seed 42
+#
+# Generates a reproducible set of fake devis with known totals, SIRETs and
+# catalog keywords, in three shapes:
+#   text   – PDF with a real text layer (pdfplumber path)
+#   scan   – PDF whose pages are images only (OCR fallback path)
+#   photo  – JPG/PNG of a printed page (image OCR path)
+# A manifest.json next to the files records the expected values.
+
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from quoteguard.pricing import load_catalog
+
+KINDS = ("text", "scan", "photo")
+LINES_PER_PAGE = 30
+
+
+def make_quote(rng, pages):
+    catalog = load_catalog()
+    entries = rng.sample(catalog, rng.randint(1, min(5, len(catalog))))
+    siret = "".join(str(rng.randint(0, 9)) for _ in range(14))
+    lines = [f"DEVIS N° {rng.randint(1000, 9999)}", "Renov Bench SARL - 12 rue de la Paix, 75002 Paris", f"SIRET : {siret}", ""]
+    subtotal = 0.0
+    filler = 0
+    for p in range(pages):
+        for e in entries if p == 0 else []:
+            qty = rng.randint(1, 3)
+            unit = round(e["cost"] * rng.uniform(0.6, 1.6), 2)
+            subtotal += qty * unit
+            lines.append(f"{e['keywords'][0].capitalize()}  {qty} u x {unit:.2f} = {qty * unit:.2f}")
+        # pad each page with neutral lines so page count drives the workload
+        while len(lines) < (p + 1) * LINES_PER_PAGE - 4:
+            filler += 1
+            lines.append(f"Prestation annexe {filler} : fournitures et main d'oeuvre comprises")
+    total = round(subtotal * 1.2, 2)
+    lines += ["", f"Total HT : {subtotal:.2f}", f"TVA 20% : {total - subtotal:.2f}", f"Total TTC : {total:.2f}"]
+    return {"siret": siret, "total": total, "items": sorted({e["name"] for e in entries}), "lines": lines}
+
+
+def _pages(lines):
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+
+def _font(size):
+    from PIL import ImageFont
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+
+def render_page(lines, dpi):
+    from PIL import Image, ImageDraw
+    w, h = int(8.27 * dpi), int(11.69 * dpi)   # A4
+    img = Image.new("L", (w, h), 255)
+    draw = ImageDraw.Draw(img)
+    size = max(10, dpi // 7)
+    font = _font(size)
+    y = dpi // 2
+    for line in lines:
+        draw.text((dpi // 2, y), line, fill=0, font=font)
+        y += int(size * 1.5)
+    return img
+
+
+def write_text_pdf(path, lines):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_font("Arial", "", 10)
+    for page in _pages(lines):
+        pdf.add_page()
+        for line in page:
+            pdf.cell(0, 8, line.encode("latin-1", "replace").decode("latin-1"), ln=True)
+    pdf.output(path)
+
+
+def write_scan_pdf(path, lines, dpi):
+    from fpdf import FPDF
+    pdf = FPDF()
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, page in enumerate(_pages(lines)):
+            png = os.path.join(tmp, f"p{i}.png")
+            render_page(page, dpi).save(png)
+            pdf.add_page()
+            pdf.image(png, 0, 0, 210, 297)
+        pdf.output(path)
+
+
+def write_photo(path, lines, dpi, rng):
+    img = render_page(lines[:LINES_PER_PAGE] + lines[-4:], dpi).convert("RGB")
+    img = img.rotate(rng.uniform(-2, 2), expand=True, fillcolor=(235, 235, 230))
+    img.save(path, quality=85) if path.endswith(".jpg") else img.save(path)
+
+
+def generate(out, count=30, seed=42, max_pages=5, dpis=(150, 200, 300)):
+    rng = random.Random(seed)
+    os.makedirs(out, exist_ok=True)
+    manifest = []
+    for n in range(count):
+        kind = KINDS[n % len(KINDS)]
+        pages = 1 if kind == "photo" else rng.randint(1, max_pages)
+        dpi = rng.choice(dpis)
+        q = make_quote(rng, pages)
+        if kind == "text":
+            fn = f"q{n:04d}_text_{pages}p.pdf"
+            write_text_pdf(os.path.join(out, fn), q["lines"])
+        elif kind == "scan":
+            fn = f"q{n:04d}_scan_{pages}p_{dpi}dpi.pdf"
+            write_scan_pdf(os.path.join(out, fn), q["lines"], dpi)
+        else:
+            fn = f"q{n:04d}_photo_{dpi}dpi.{rng.choice(['jpg', 'png'])}"
+            write_photo(os.path.join(out, fn), q["lines"], dpi, rng)
+        manifest.append({"file": fn, "kind": kind, "pages": pages, "dpi": dpi,
+                         "siret": q["siret"], "total": q["total"], "items": q["items"]})
+    with open(os.path.join(out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"seed": seed, "count": count, "quotes": manifest}, f, indent=1, ensure_ascii=False)
+    return manifest
+
+
+def load_manifest(out):
+    with open(os.path.join(out, "manifest.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench.corpus", description="Generate a synthetic quote corpus.")
+    p.add_argument("--out", default=os.path.join("bench", "corpus"))
+    p.add_argument("--count", type=int, default=30)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--max-pages", type=int, default=5)
+    args = p.parse_args(argv)
+    generate(args.out, args.count, args.seed, args.max_pages)
+    print(f"Wrote {args.count} quotes to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
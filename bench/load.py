@@ -0,0 +1,325 @@
+# ==============================
+# QuoteGuard – Concurrent Session Load Test
+# ==============================
+# Run: python -m bench.load                                   (10 users, 2 audits/s, 30 s)
+#      python -m bench.load --users 40 --rate 8 --duration 120 --mix text=3,scan=1,photo=1
+#      python -m bench.load --latency 0.2 --jitter 0.3 --error-rate 0.05 --hang-rate 0.01
+#
+# Simulates sessions going through the same flow as the page:
+#   upload -> background extraction job (queue admission, polling) -> pricing,
+#   all-regions comparison and score -> audit record -> PDF report
+# against a local stub registry with injectable latency and faults.
+#
+# Arrivals are open-loop: a Poisson schedule at --rate, served by --users
+# concurrent sessions. Latency is measured from each session's scheduled arrival,
+# so time spent waiting for a free user counts too; a saturated server shows up
+# as growing latency instead of a silently lower load.
+#
+# Every upload gets a unique trailer so it misses the extraction cache like a
+# fresh quote would, and by default the SIRET cache and near-duplicate reuse are
+# off too, since the corpus is small and repeats are not real reissues (--warm
+# turns them back on). Stores, caches and the index live in a temp directory.
+# Reports throughput, tail latency, error rate, and a per-second timeline of
+# CPU and memory for this process and each extraction worker (Linux /proc).
+# Results are saved as bench/results/load-<commit>.json.
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import corpus, stub_registry
+from bench.run import T, git_commit, percentile
+from quoteguard import engine, extraction, jobs, similarity, store
+from quoteguard.cache import ExtractCache
+from quoteguard.comparison import compare_regions
+from quoteguard.siret_client import SiretClient
+
+POLL_SECONDS = 0.05         # finer than the page's 0.5 s so job completion is timed closely
+ADMISSION_RETRY = 1.0       # the page retries a full queue every second
+GIVE_UP_AFTER = 30.0        # a user waiting this long for admission leaves
+
+
+# ---------- PROCESS SAMPLING ----------
+_TICK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _proc(pid):
+    """(cpu seconds, rss MB) for a live pid from /proc, or None."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration, IndexError, ValueError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / _TICK, rss / 1024
+
+
+class ProcessSampler(threading.Thread):
+    """Every interval, records CPU % and RSS of this process and each extraction worker.
+    Short-lived children (tesseract) are reported together as role "ocr" once reaped."""
+
+    def __init__(self, interval=1.0):
+        super().__init__(name="quoteguard-load-sampler", daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._halt = threading.Event()
+        self.start_time = time.perf_counter()
+
+    def _pids(self):
+        pool = extraction._pool
+        workers = list(getattr(pool, "_processes", None) or {}) if pool else []
+        return [("main", os.getpid())] + [("worker", pid) for pid in workers]
+
+    def run(self):
+        last = {}
+        last_children = 0.0
+        while not self._halt.wait(self.interval):
+            t = round(time.perf_counter() - self.start_time, 2)
+            for role, pid in self._pids():
+                now = _proc(pid)
+                if now is None:
+                    if role == "main":     # no /proc: peak RSS and CPU from getrusage
+                        ru = resource.getrusage(resource.RUSAGE_SELF)
+                        now = (ru.ru_utime + ru.ru_stime, ru.ru_maxrss / 1024)
+                    else:
+                        continue
+                cpu = (now[0] - last[pid]) / self.interval * 100 if pid in last else 0.0
+                last[pid] = now[0]
+                self.samples.append({"t": t, "role": role, "pid": pid, "cpu_pct": round(cpu, 1), "rss_mb": round(now[1], 1)})
+            ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+            children = ru.ru_utime + ru.ru_stime
+            self.samples.append({"t": t, "role": "ocr", "pid": 0, "cpu_pct": round((children - last_children) / self.interval * 100, 1), "rss_mb": None})
+            last_children = children
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+# ---------- SESSIONS ----------
+def parse_mix(spec, available):
+    weights = {}
+    for part in spec.split(","):
+        kind, _, w = part.partition("=")
+        weights[kind.strip()] = float(w or 1)
+    return {k: w for k, w in weights.items() if k in available and w > 0}
+
+
+class LoadTest:
+    def __init__(self, corpus_dir, users, rate, duration, mix, workers, max_pending, seed=0):
+        self.users, self.rate, self.duration = users, rate, duration
+        self.rng = random.Random(seed)
+        manifest = corpus.load_manifest(corpus_dir)["quotes"]
+        has_ocr = shutil.which("tesseract") is not None
+        by_kind = {}
+        for q in manifest:
+            if q["kind"] == "text" or has_ocr:
+                with open(os.path.join(corpus_dir, q["file"]), "rb") as f:
+                    by_kind.setdefault(q["kind"], []).append((q["file"], f.read()))
+        self.files = by_kind
+        self.mix = parse_mix(mix, by_kind)
+        self.skipped_kinds = [] if has_ocr else [k for k in corpus.KINDS if k != "text"]
+        self.queue = jobs.JobQueue(workers=workers, max_pending=max_pending, orphan_after=3600)
+        self.results = []
+        self._lock = threading.Lock()
+
+    def pick(self, rng):
+        kind = rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        name, data = rng.choice(self.files[kind])
+        return kind, name, data
+
+    def session(self, n, arrival, t0):
+        """One simulated user audit; arrival is the scheduled perf_counter() time."""
+        rng = random.Random(n)
+        kind, name, data = self.pick(rng)
+        data += f"\n%load-{n}\n".encode()     # unique bytes: miss the extraction cache
+        mime = engine.MIME_TYPES[os.path.splitext(name)[1].lower()]
+        row = {"n": n, "kind": kind, "file": name, "arrival": round(arrival - t0, 3),
+               "start_delay": round(time.perf_counter() - arrival, 3), "rejected": 0, "error": None}
+        try:
+            while True:
+                try:
+                    job = self.queue.submit(f"user-{n}", jobs.extract_job, data, mime)
+                    break
+                except jobs.QueueFull:
+                    row["rejected"] += 1
+                    if time.perf_counter() - arrival > GIVE_UP_AFTER:
+                        raise
+                    time.sleep(ADMISSION_RETRY)
+            while not job.done:
+                time.sleep(POLL_SECONDS)
+                self.queue.get(job.id)
+            row["queue_wait"] = round(job.started - job.submitted, 3) if job.started else None
+            if job.status != jobs.DONE:
+                raise RuntimeError(job.error or job.status)
+            row["job"] = round(job.finished - job.started, 3)
+
+            details, company, previous = job.result
+            region = rng.choice(list(engine.REGIONS))
+            price = details["amount"] or engine.DEFAULT_PRICE
+            fair, items = engine.calculate_smart_fair_price(details["text"], engine.REGIONS[region], details["parsed"]["items"], region)
+            diff, markup, score = engine.trust_score(price, fair)
+            compare_regions(items, price)
+            name_, status, addr = company or ("Unknown", "CHECK", "")
+            engine.record_audit({"session": f"load-{n}", "quote_hash": details["quote_hash"], "siret": details["siret"],
+                                 "company": name_, "region": region, "project": "load", "price": price, "fair": fair,
+                                 "score": score, "items": items, "timings": job.timings})
+            engine.render_report(T, "load", region, name_, status, addr, price, fair, diff, "HIGH" if score < engine.RISK_THRESHOLD else "FAIR", items)
+            row["registry"] = status if details["siret"] else None
+        except jobs.QueueFull:
+            row["error"] = "queue_full"
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+        row["done"] = round(time.perf_counter() - t0, 3)
+        row["latency"] = round(time.perf_counter() - arrival, 3)
+        with self._lock:
+            self.results.append(row)
+
+    def run(self):
+        pool = ThreadPoolExecutor(self.users, thread_name_prefix="quoteguard-load-user")
+        t0 = time.perf_counter()
+        arrival, n = t0, 0
+        while True:
+            arrival += self.rng.expovariate(self.rate)
+            if arrival - t0 >= self.duration:
+                break
+            time.sleep(max(0.0, arrival - time.perf_counter()))
+            pool.submit(self.session, n, arrival, t0)
+            n += 1
+        pool.shutdown(wait=True)
+        self.queue.shutdown()
+        return time.perf_counter() - t0
+
+
+# ---------- REPORT ----------
+def summarize(rows, samples, elapsed, duration, stub_stats):
+    ok = [r for r in rows if not r["error"]]
+    lat = [r["latency"] for r in ok]
+    errors = {}
+    for r in rows:
+        if r["error"]:
+            key = r["error"].split(":")[0]
+            errors[key] = errors.get(key, 0) + 1
+    ms = lambda xs, q: round(percentile(xs, q) * 1000, 1)
+
+    timeline = {}
+    for r in rows:
+        b = timeline.setdefault(int(r["done"]), {"done": 0, "errors": 0, "latency": []})
+        b["done"] += 1
+        b["errors"] += bool(r["error"])
+        if not r["error"]:
+            b["latency"].append(r["latency"])
+    for s in samples:
+        b = timeline.setdefault(int(s["t"]), {"done": 0, "errors": 0, "latency": []})
+        key = s["role"]
+        b[f"{key}_cpu_pct"] = round(b.get(f"{key}_cpu_pct", 0) + s["cpu_pct"], 1)
+        if s["rss_mb"] is not None:
+            b[f"{key}_rss_mb"] = round(b.get(f"{key}_rss_mb", 0) + s["rss_mb"], 1)
+    for b in timeline.values():
+        xs = b.pop("latency")
+        b["p95_ms"] = ms(xs, 0.95) if xs else None
+
+    peak = {}
+    for s in samples:
+        if s["rss_mb"] is not None:
+            peak[s["role"]] = max(peak.get(s["role"], 0), s["rss_mb"])
+    return {
+        "sessions": len(rows), "completed": len(ok), "error_rate": round(1 - len(ok) / len(rows), 4) if rows else 0.0,
+        "errors": errors, "admission_rejections": sum(r["rejected"] for r in rows),
+        "arrival_rate": round(len(rows) / duration, 3), "throughput_per_s": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": {"p50": ms(lat, 0.5), "p90": ms(lat, 0.9), "p95": ms(lat, 0.95), "p99": ms(lat, 0.99), "max": round(max(lat) * 1000, 1) if lat else 0.0},
+        "queue_wait_ms": {q: ms([r["queue_wait"] for r in ok if r.get("queue_wait") is not None], v) for q, v in (("p50", 0.5), ("p95", 0.95))},
+        "job_ms": {q: ms([r["job"] for r in ok], v) for q, v in (("p50", 0.5), ("p95", 0.95))},
+        "registry": {"served": stub_stats, "unverified_sessions": sum(r.get("registry") == "CHECK" for r in ok)},
+        "peak_rss_mb": peak,
+        "timeline": [{"t": t, **timeline[t]} for t in sorted(timeline)],
+    }
+
+
+def print_report(result):
+    m, s = result["meta"], result["summary"]
+    print(f"commit {m['commit']} · {m['users']} users · {m['rate']}/s for {m['duration']}s · mix {m['mix']}")
+    if m["skipped_kinds"]:
+        print(f"skipped {', '.join(m['skipped_kinds'])} quotes: tesseract not installed")
+    print(f"sessions {s['sessions']}  completed {s['completed']}  error rate {s['error_rate']:.1%}  {s['errors'] or ''}")
+    print(f"arrivals {s['arrival_rate']}/s  throughput {s['throughput_per_s']}/s  admission rejections {s['admission_rejections']}")
+    print(f"latency ms  {s['latency_ms']}")
+    print(f"queue wait  {s['queue_wait_ms']}  job {s['job_ms']}")
+    print(f"registry    {s['registry']}")
+    print(f"peak RSS MB {s['peak_rss_mb']}")
+    print(f"{'t':>4} {'done':>5} {'err':>4} {'p95 ms':>8} {'cpu%':>6} {'rss MB':>7} {'wk cpu%':>8} {'wk MB':>7} {'ocr%':>5}")
+    for b in s["timeline"]:
+        print(f"{b['t']:>4} {b['done']:>5} {b['errors']:>4} {b['p95_ms'] or '-':>8} {b.get('main_cpu_pct', '-'):>6} {b.get('main_rss_mb', '-'):>7} "
+              f"{b.get('worker_cpu_pct', '-'):>8} {b.get('worker_rss_mb', '-'):>7} {b.get('ocr_cpu_pct', '-'):>5}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench.load", description="Concurrent-session load test against a stub registry.")
+    p.add_argument("--corpus", default=os.path.join("bench", "corpus"))
+    p.add_argument("--count", type=int, default=30, help="quotes to generate if the corpus is missing")
+    p.add_argument("--users", type=int, default=10, help="concurrent simulated sessions")
+    p.add_argument("--rate", type=float, default=2.0, help="mean audit arrivals per second (Poisson)")
+    p.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    p.add_argument("--mix", default="text=1,scan=1,photo=1", help="relative weights of quote kinds")
+    p.add_argument("--workers", type=int, default=jobs.WORKERS, help="background job workers")
+    p.add_argument("--queue", type=int, default=jobs.MAX_PENDING, help="jobs allowed to wait beyond the running ones")
+    p.add_argument("--latency", type=float, default=0.05, help="stub registry latency in seconds")
+    p.add_argument("--jitter", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--hang-rate", type=float, default=0.0)
+    p.add_argument("--warm", action="store_true", help="keep the SIRET cache and near-duplicate company reuse on")
+    p.add_argument("--interval", type=float, default=1.0, help="CPU/memory sampling interval in seconds")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="result file (default: bench/results/load-<commit>.json)")
+    args = p.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.corpus, "manifest.json")):
+        corpus.generate(args.corpus, args.count)
+    server, url = stub_registry.start(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                      hang_rate=args.hang_rate, seed=args.seed)
+    tmp = tempfile.mkdtemp(prefix="qg-load-")
+    engine._siret_client = SiretClient(base_url=url) if args.warm else SiretClient(base_url=url, ttl=0, negative_ttl=0)
+    engine._extract_cache = ExtractCache(os.path.join(tmp, "extract"))
+    store._store = store.AuditStore(os.path.join(tmp, "audits.db"))
+    # quotes are still signed and indexed; a threshold above 1 only stops matches
+    similarity._index = similarity.QuoteIndex(os.path.join(tmp, "audits.db"), threshold=similarity.THRESHOLD if args.warm else 1.01)
+    try:
+        test = LoadTest(args.corpus, args.users, args.rate, args.duration, args.mix, args.workers, args.queue, args.seed)
+        if not test.mix:
+            p.error(f"no quotes of kinds {args.mix} available (installed OCR: {not test.skipped_kinds})")
+        sampler = ProcessSampler(args.interval)
+        sampler.start()
+        elapsed = test.run()
+        sampler.stop()
+        store._store.flush()
+    finally:
+        server.shutdown()
+        store._store.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    result = {
+        "meta": {"commit": git_commit(), "users": args.users, "rate": args.rate, "duration": args.duration,
+                 "mix": test.mix, "workers": args.workers, "queue": args.queue, "cpus": os.cpu_count(),
+                 "extraction_workers": extraction.MAX_WORKERS, "skipped_kinds": test.skipped_kinds, "warm": args.warm,
+                 "registry": {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate, "hang_rate": args.hang_rate}},
+        "summary": summarize(test.results, sampler.samples, elapsed, args.duration, dict(server.stats)),
+        "sessions": sorted(test.results, key=lambda r: r["n"]),
+    }
+    out = args.out or os.path.join("bench", "results", f"load-{result['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=1)
+    print_report(result)
+    print(f"saved {out}")
+
+
+if __name__ == "__main__":
+    main()
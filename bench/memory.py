@@ -0,0 +1,76 @@
+# ==============================
+# QuoteGuard – Peak Memory vs Document Size
+# ==============================
+# Run: python -m bench.memory                        (10, 50, 150 page quotes)
+#      python -m bench.memory --pages 10 100 300 --kind scan --workers 1 4
+#
+# Each quote is extracted in a fresh interpreter so ru_maxrss measures that one
+# audit: "main" is the peak growth of the extracting process over its
+# post-import baseline, "workers" the largest extraction worker. With
+# streaming ingestion both should stay flat as the page count grows.
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+from bench import corpus
+from bench.run import git_commit, peak_rss_mb
+
+
+def make_document(path, pages, kind, dpi=150):
+    q = corpus.make_quote(random.Random(pages), pages)
+    if kind == "text":
+        corpus.write_text_pdf(path, q["lines"])
+    else:
+        corpus.write_scan_pdf(path, q["lines"], dpi)
+
+
+def child(path, workers):
+    from quoteguard import extraction
+    extraction.MAX_WORKERS = workers
+    extraction.MAX_PAGES = sys.maxsize    # measure beyond the production page cap
+    with open(path, "rb") as f:
+        data = f.read()
+    base = peak_rss_mb()[0]
+    chars = sum(len(t) for t in extraction.iter_pages(data, "application/pdf", {}))
+    main = peak_rss_mb()[0] - base
+    if extraction._pool is not None:
+        extraction._pool.shutdown(wait=True)    # workers must be reaped to show up in RUSAGE_CHILDREN
+    print(json.dumps({"chars": chars, "main_mb": round(main, 1), "workers_mb": peak_rss_mb()[1]}))
+
+
+def run(pages=(10, 50, 150), kind="text", workers=(1, 4)):
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="qg-mem-") as tmp:
+        for n in pages:
+            path = os.path.join(tmp, f"{kind}_{n}p.pdf")
+            make_document(path, n, kind)
+            for w in workers:
+                out = subprocess.check_output([sys.executable, "-m", "bench.memory", "--child", path, str(w)], text=True)
+                rows.append({"pages": n, "kind": kind, "workers": w, "bytes": os.path.getsize(path), **json.loads(out.splitlines()[-1])})
+    return {"commit": git_commit(), "rows": rows}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench.memory", description="Peak extraction memory by document size.")
+    p.add_argument("--pages", type=int, nargs="+", default=[10, 50, 150])
+    p.add_argument("--kind", choices=("text", "scan"), default="text", help="scan needs tesseract")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    p.add_argument("--child", nargs=2, metavar=("PDF", "WORKERS"), help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        return child(args.child[0], int(args.child[1]))
+    result = run(args.pages, args.kind, args.workers)
+    print(f"commit {result['commit']} · {args.kind} PDFs")
+    print(f"{'pages':>6} {'workers':>8} {'size KB':>9} {'main MB':>9} {'worker MB':>10}")
+    for r in result["rows"]:
+        print(f"{r['pages']:>6} {r['workers']:>8} {r['bytes'] // 1024:>9} {r['main_mb']:>9} {r['workers_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# ==============================
+# QuoteGuard – Benchmark Runner
+# ==============================
+# Run: python -m bench.run                       (generates bench/corpus if missing)
+#      python -m bench.run --repeat 5 --out bench/results/mychange.json
+#      python -m bench.run --compare bench/results/a.json bench/results/b.json
+#
+# Times each stage of the audit separately over the synthetic corpus and
+# reports throughput, p50/p95 latency and peak RSS. Results are saved as JSON
+# (one file per commit by default) so two runs can be compared.
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from bench import corpus, stub_registry
+from quoteguard import engine
+from quoteguard.cache import ExtractCache
+from quoteguard.charts import create_donut, create_gauge
+from quoteguard.siret_client import SiretClient
+
+REGION = next(iter(engine.REGIONS))
+T = {"title": "QuoteGuard", "subtitle": "Bench", "metric_quote": "Quoted Price",
+     "metric_fair": "Smart Estimate", "disclaimer": "Benchmark report."}
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = (len(s) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    self_ = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(self_, 1), round(children, 1)
+
+
+class Timer:
+    def __init__(self):
+        self.samples = {}
+        self.rss = {}
+
+    def time(self, stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        self.rss[stage] = max(self.rss.get(stage, 0), peak_rss_mb()[0])
+        return result
+
+    def report(self):
+        out = {}
+        for stage, xs in self.samples.items():
+            total = sum(xs)
+            out[stage] = {
+                "n": len(xs),
+                "total_s": round(total, 4),
+                "throughput_per_s": round(len(xs) / total, 2) if total else None,
+                "p50_ms": round(percentile(xs, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(xs, 0.95) * 1000, 3),
+                "max_ms": round(max(xs) * 1000, 3),
+                "peak_rss_mb": self.rss[stage],
+            }
+        return out
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(corpus_dir, repeat=3, kinds=None, latency=0.0):
+    manifest = corpus.load_manifest(corpus_dir)["quotes"]
+    has_ocr = shutil.which("tesseract") is not None
+    skipped = []
+    if not has_ocr:
+        skipped = [q["file"] for q in manifest if q["kind"] != "text"]
+        manifest = [q for q in manifest if q["kind"] == "text"]
+    if kinds:
+        manifest = [q for q in manifest if q["kind"] in kinds]
+
+    server, url = stub_registry.start(latency=latency)
+    engine._siret_client = SiretClient(base_url=url)
+    cache_dir = tempfile.mkdtemp(prefix="qg-bench-")
+    engine._extract_cache = ExtractCache(cache_dir)
+    timer = Timer()
+    accuracy = {"amount": 0, "siret": 0, "items": 0, "n": 0}
+
+    try:
+        for _ in range(repeat):
+            for q in manifest:
+                with open(os.path.join(corpus_dir, q["file"]), "rb") as f:
+                    data = f.read()
+                mime = engine.MIME_TYPES[os.path.splitext(q["file"])[1].lower()]
+                kind = q["kind"]
+
+                engine._extract_cache.clear()
+                price, siret, text = timer.time(f"extract_data[{kind}]", engine.extract_bytes, data, mime)
+                timer.time("extract_data[cached]", engine.extract_bytes, data, mime)
+                fair, items = timer.time("calculate_smart_fair_price", engine.calculate_smart_fair_price, text, engine.REGIONS[REGION])
+                engine._siret_client.cache.clear()
+                timer.time("check_siret", engine.check_siret, q["siret"])
+                timer.time("check_siret[cached]", engine.check_siret, q["siret"])
+                diff, markup, score = engine.trust_score(price or engine.DEFAULT_PRICE, fair)
+                timer.time("create_gauge", create_gauge, score, "Trust Score")
+                timer.time("create_donut", create_donut, items, fair * 0.3)
+                timer.time("create_pdf", engine.create_pdf, T, "General", REGION, "Bench SARL", "ACTIVE", "", price, fair, diff, "FAIR", items)
+
+                accuracy["n"] += 1
+                accuracy["amount"] += abs(price - q["total"]) < 0.01
+                accuracy["siret"] += siret == q["siret"]
+                accuracy["items"] += sorted(i["name"] for i in items) == q["items"]
+    finally:
+        server.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    n = accuracy.pop("n") or 1
+    self_rss, children_rss = peak_rss_mb()
+    return {
+        "meta": {
+            "commit": git_commit(), "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "corpus": corpus_dir, "quotes": len(manifest), "repeat": repeat, "stub_latency_s": latency,
+            "skipped_no_tesseract": skipped,
+        },
+        "peak_rss_mb": {"self": self_rss, "children": children_rss},
+        "accuracy": {k: round(v / n, 3) for k, v in accuracy.items()},
+        "stages": timer.report(),
+    }
+
+
+def print_report(result):
+    print(f"commit {result['meta']['commit']} · {result['meta']['quotes']} quotes x {result['meta']['repeat']}")
+    print(f"{'stage':34} {'n':>5} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'rss MB':>8}")
+    for stage, s in result["stages"].items():
+        print(f"{stage:34} {s['n']:>5} {s['throughput_per_s'] or 0:>9} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['peak_rss_mb']:>8}")
+    print(f"peak RSS: {result['peak_rss_mb']}  accuracy: {result['accuracy']}")
+    if result["meta"]["skipped_no_tesseract"]:
+        print(f"skipped {len(result['meta']['skipped_no_tesseract'])} scan/photo quotes: tesseract not installed")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f: old = json.load(f)
+    with open(new_path) as f: new = json.load(f)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(f"{'stage':34} {'p50 old':>9} {'p50 new':>9} {'p95 old':>9} {'p95 new':>9} {'speedup':>8}")
+    for stage in sorted(set(old["stages"]) | set(new["stages"])):
+        a, b = old["stages"].get(stage), new["stages"].get(stage)
+        if not a or not b:
+            print(f"{stage:34} {'only in ' + ('new' if b else 'old'):>9}")
+            continue
+        speedup = a["p50_ms"] / b["p50_ms"] if b["p50_ms"] else float("inf")
+        print(f"{stage:34} {a['p50_ms']:>9} {b['p50_ms']:>9} {a['p95_ms']:>9} {b['p95_ms']:>9} {speedup:>7.2f}x")
+    print(f"peak RSS: {old['peak_rss_mb']} -> {new['peak_rss_mb']}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench.run", description="Per-stage QuoteGuard benchmark.")
+    p.add_argument("--corpus", default=os.path.join("bench", "corpus"))
+    p.add_argument("--count", type=int, default=30, help="quotes to generate if the corpus is missing")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--kind", action="append", choices=corpus.KINDS, help="only these quote kinds (repeatable)")
+    p.add_argument("--latency", type=float, default=0.0, help="stub registry latency in seconds")
+    p.add_argument("--out", help="result file (default: bench/results/<commit>.json)")
+    p.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = p.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare)
+    if not os.path.exists(os.path.join(args.corpus, "manifest.json")):
+        corpus.generate(args.corpus, args.count)
+    result = run(args.corpus, args.repeat, args.kind, args.latency)
+    out = args.out or os.path.join("bench", "results", f"{result['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=1)
+    print_report(result)
+    print(f"saved {out}")
+
+
+if __name__ == "__main__":
+    main()
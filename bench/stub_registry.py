@@ -0,0 +1,124 @@
+# ==============================
+# QuoteGuard – Stub Company Registry
+# ==============================
+# Run: python -m bench.stub_registry --port 7070 --latency 0.05
+#      python -m bench.stub_registry --latency 0.2 --jitter 0.3 --error-rate 0.05 --hang-rate 0.01
+#      QUOTEGUARD_REGISTRY_URL=http://127.0.0.1:7070 streamlit run app.py
+#
+# Local stand-in for recherche-entreprises.api.gouv.fr/search. Answers are
+# derived from the SIRET digits, so they are stable across runs:
+# last digit 0-6 -> active company, 7-8 -> closed, 9 -> no match.
+# Faults can be injected: extra random latency (jitter), a fraction of
+# 429/500/503 answers (error_rate) and of requests that hang past the
+# client's read timeout (hang_rate). server.stats counts what was served.
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def company_for(siret):
+    if not siret or not siret[-1].isdigit() or siret[-1] == "9":
+        return []
+    return [{
+        "siren": siret[:9],
+        "nom_complet": f"ENTREPRISE {siret[:9]}",
+        "etat_administratif": "A" if siret[-1] < "7" else "C",
+        "siege": {"siret": siret, "adresse": f"{int(siret[-3:]) % 200 + 1} RUE DU TEST 75001 PARIS"},
+    }]
+
+
+ERROR_CODES = (429, 500, 503)
+HANG_SECONDS = 10.0     # longer than SiretClient's 5 s read timeout
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    hang_rate = 0.0
+    rng = random.Random()
+    stats = None                    # {"requests", "errors", "hangs"}; set per server by start()
+    stats_lock = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/search":
+            return self._send(404, {"erreur": "not found"})
+        roll = self.rng.random()
+        self._count("requests")
+        if roll < self.hang_rate:
+            self._count("hangs")
+            time.sleep(HANG_SECONDS)
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if self.hang_rate <= roll < self.hang_rate + self.error_rate:
+            self._count("errors")
+            code = self.rng.choice(ERROR_CODES)
+            return self._send(code, {"erreur": "injected"}, {"Retry-After": "1"} if code == 429 else {})
+        q = parse_qs(url.query).get("q", [""])[0].replace(" ", "")
+        results = company_for(q)
+        self._send(200, {"results": results, "total_results": len(results), "page": 1, "per_page": 10})
+
+    def _count(self, key):
+        if self.stats is not None:
+            with self.stats_lock:
+                self.stats[key] += 1
+
+    def _send(self, code, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(code)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client gave up (read timeout after a hang); nothing left to answer
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port=0, latency=0.0, handler=StubHandler, jitter=0.0, error_rate=0.0, hang_rate=0.0, seed=None):
+    """Start the stub in a background thread; returns (server, base_url). server.stats counts requests/errors/hangs."""
+    stats = {"requests": 0, "errors": 0, "hangs": 0}
+    cls = type("ConfiguredStubHandler", (handler,), {
+        "latency": latency, "jitter": jitter, "error_rate": error_rate, "hang_rate": hang_rate,
+        "rng": random.Random(seed), "stats": stats, "stats_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), cls)
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench.stub_registry")
+    p.add_argument("--port", type=int, default=7070)
+    p.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    p.add_argument("--jitter", type=float, default=0.0, help="extra random latency, uniform in [0, JITTER] seconds")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 429/500/503")
+    p.add_argument("--hang-rate", type=float, default=0.0, help=f"fraction of requests that stall {HANG_SECONDS:g}s")
+    p.add_argument("--seed", type=int)
+    args = p.parse_args(argv)
+    server, url = start(args.port, args.latency, jitter=args.jitter, error_rate=args.error_rate, hang_rate=args.hang_rate, seed=args.seed)
+    print(f"Stub registry on {url}/search?q=<siret> (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# QuoteGuard – shared audit building blocks used by app.py
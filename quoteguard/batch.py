@@ -0,0 +1,282 @@
+# ==============================
+# QuoteGuard – Headless Batch Audit
+# ==============================
+# Run: python -m quoteguard.batch quotes/ -o results.jsonl
+#      python -m quoteguard.batch quotes.zip -o results.csv --region "Lyon / Rhône-Alpes"
+#      python -m quoteguard.batch quotes/ -o results_parquet/ --format parquet   (needs pyarrow)
+#      python -m quoteguard.batch quotes/ -o results.jsonl --reports reports/ --lang Français
+#
+# Quotes are audited in parallel and one row per quote is written as soon as
+# it finishes, so memory stays flat however large the backlog. Re-running with
+# the same output skips quotes that are already in it; failed ones are retried.
+
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from quoteguard import engine
+from quoteguard.extraction import check_limit
+from quoteguard.store import get_store
+from quoteguard.translations import TRANSLATIONS
+
+FIELDS = ["file", "quote_hash", "region", "price", "total_ht", "tva", "total_ttc", "line_count", "fair", "diff", "markup", "score", "risk",
+          "siret", "company", "siret_status", "address", "previous_hash", "similarity", "items", "report", "error", "seconds"]
+
+
+def iter_quotes(source):
+    """Yield (quote_id, loader) pairs; loader is a picklable (kind, path, member) tuple."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for member in sorted(zf.namelist()):
+                if os.path.splitext(member)[1].lower() in engine.MIME_TYPES:
+                    yield member, ("zip", source, member)
+    else:
+        for root, _, files in os.walk(source):
+            for fn in sorted(files):
+                if os.path.splitext(fn)[1].lower() in engine.MIME_TYPES:
+                    path = os.path.join(root, fn)
+                    yield os.path.relpath(path, source), ("file", path, None)
+
+
+def read_quote(loader):
+    # Size is checked before reading, so an oversized file is never loaded
+    kind, path, member = loader
+    if kind == "zip":
+        with zipfile.ZipFile(path) as zf:
+            check_limit("bytes", zf.getinfo(member).file_size)
+            return zf.read(member)
+    check_limit("bytes", os.path.getsize(path))
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _init_worker():
+    # Parallelism comes from auditing several quotes at once; keep per-page extraction inline
+    from quoteguard import extraction
+    extraction.MAX_WORKERS = 1
+
+
+def write_report(result, report_dir, lang, quote_id):
+    # Rendered and written inside the worker, so reports never pile up in the parent
+    t = TRANSLATIONS[lang]
+    risk = t["risk_high"] if result["risk"] == "HIGH" else t["risk_safe"]
+    pdf = engine.create_pdf(t, None, result["region"], result["company"], result["siret_status"], result["address"],
+                            result["price"], result["fair"], result["diff"], risk, result["items"])
+    path = os.path.join(report_dir, os.path.splitext(quote_id)[0].replace("/", "__").replace(os.sep, "__") + ".pdf")
+    with open(path, "wb") as f:
+        f.write(pdf)
+    return path
+
+
+def audit_one(quote_id, loader, region, verify_siret, report_dir=None, lang="English"):
+    start = time.perf_counter()
+    row = {"file": quote_id, "region": region}
+    try:
+        data = read_quote(loader)
+        mime = engine.MIME_TYPES[os.path.splitext(quote_id)[1].lower()]
+        result = engine.audit(data, mime, region, verify_siret)
+        result.pop("text")
+        result["line_count"] = len(result.pop("line_items"))
+        if report_dir: result["report"] = write_report(result, report_dir, lang, quote_id)
+        row.update(result)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+# ---------- WRITERS ----------
+def flat(row):
+    # CSV/Parquet get item names only; JSONL keeps the full item dicts
+    items = row.get("items")
+    return {**row, "items": "; ".join(i["name"] for i in items) if isinstance(items, list) else items}
+
+
+def drop_partial_line(path, block=65536):
+    # A killed run can leave a partial last row. Cut it (that quote is audited again) so
+    # appended rows start on a line of their own; a CSV row torn inside a quoted field
+    # would otherwise swallow everything written after it.
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        size = end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            step = min(end, block)
+            f.seek(end - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline >= 0:
+                end -= step - newline - 1
+                break
+            end -= step
+        if end < size:
+            f.truncate(end)
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        drop_partial_line(path)
+        self.f = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def done(path):
+        if not os.path.exists(path):
+            return set()
+        ids = set()
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue    # blank or truncated line: that quote is audited again
+                if isinstance(row, dict) and "file" in row and not row.get("error"):
+                    ids.add(row["file"])
+        return ids
+
+    def write(self, row):
+        self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class CsvWriter:
+    def __init__(self, path):
+        drop_partial_line(path)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.f = open(path, "a", encoding="utf-8", newline="")
+        self.w = csv.DictWriter(self.f, fieldnames=FIELDS, extrasaction="ignore")
+        if new: self.w.writeheader()
+
+    @staticmethod
+    def done(path):
+        if not os.path.exists(path):
+            return set()
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return {row["file"] for row in csv.DictReader(f) if not row.get("error")}
+
+    def write(self, row):
+        self.w.writerow(flat(row))
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter:
+    # Parquet files can't be appended to, so output is a directory of part files,
+    # each closed after batch_size rows. A crash loses at most one unflushed part.
+    def __init__(self, path, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def done(path):
+        import pyarrow.parquet as pq
+        ids = set()
+        for part in glob.glob(os.path.join(path, "part-*.parquet")):
+            table = pq.read_table(part, columns=["file", "error"]).to_pydict()
+            ids.update(f for f, error in zip(table["file"], table["error"]) if not error)
+        return ids
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pylist([{k: r.get(k) for k in FIELDS} for r in map(flat, self.rows)])
+        pq.write_table(table, os.path.join(self.path, f"part-{time.time_ns()}.parquet"))
+        self.rows = []
+
+    def close(self):
+        self.flush()
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def guess_format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in WRITERS else "jsonl"
+
+
+def run(source, output, fmt=None, region=None, workers=None, verify_siret=True, progress=True, report_dir=None, lang="English", store=True):
+    fmt = fmt or guess_format(output)
+    region = region or next(iter(engine.REGIONS))
+    if region not in engine.REGIONS:
+        raise SystemExit(f"Unknown region {region!r}. Choose from: {', '.join(engine.REGIONS)}")
+    if report_dir: os.makedirs(report_dir, exist_ok=True)
+    writer_cls = WRITERS[fmt]
+    writer = writer_cls(output)         # drops a partial last row first, so done() never sees it
+    skip = writer_cls.done(output)
+    workers = workers or os.cpu_count() or 1
+
+    audit_store = get_store() if store else None
+    counts = {"done": 0, "skipped": 0, "errors": 0}
+    pending = set()
+    quotes = iter_quotes(source)
+    try:
+        # spawn: the audit store's writer thread is already running, forking it is unsafe
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, mp_context=multiprocessing.get_context("spawn")) as ex:
+            # Keep at most 2x workers quotes in flight so a huge folder never queues up in memory
+            while True:
+                while len(pending) < workers * 2:
+                    nxt = next(quotes, None)
+                    if nxt is None:
+                        break
+                    if nxt[0] in skip:
+                        counts["skipped"] += 1
+                        continue
+                    pending.add(ex.submit(audit_one, nxt[0], nxt[1], region, verify_siret, report_dir, lang))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    row = fut.result()
+                    writer.write(row)
+                    if audit_store is not None and not row.get("error"):
+                        engine.record_audit({**row, "session": "batch", "project": None})
+                    counts["done"] += 1
+                    if row.get("error"): counts["errors"] += 1
+                    if progress:
+                        print(f"[{counts['done']}] {row['file']} score={row.get('score')} {row.get('error') or ''}", file=sys.stderr)
+    finally:
+        writer.close()
+        if audit_store is not None: audit_store.flush()
+    return counts
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m quoteguard.batch", description="Audit a folder or zip of quotes without the UI.")
+    p.add_argument("source", help="directory or .zip of PDF/JPG/PNG quotes")
+    p.add_argument("-o", "--output", required=True, help="results file (.jsonl/.csv) or directory (parquet)")
+    p.add_argument("-f", "--format", choices=sorted(WRITERS), help="output format (default: from the output extension, else jsonl; parquet needs pyarrow)")
+    p.add_argument("-r", "--region", help="region used for fair prices (default: %s)" % next(iter(engine.REGIONS)))
+    p.add_argument("-w", "--workers", type=int, help="parallel audits (default: number of cores)")
+    p.add_argument("--no-siret", action="store_true", help="skip the company registry lookup")
+    p.add_argument("--no-store", action="store_true", help="don't record the audits in the audit store")
+    p.add_argument("--reports", metavar="DIR", help="also write one PDF audit report per quote into DIR")
+    p.add_argument("--lang", choices=sorted(TRANSLATIONS), default="English", help="report language")
+    p.add_argument("-q", "--quiet", action="store_true")
+    args = p.parse_args(argv)
+
+    counts = run(args.source, args.output, args.format, args.region, args.workers, not args.no_siret, not args.quiet, args.reports, args.lang, not args.no_store)
+    print(f"Audited {counts['done']} quotes ({counts['errors']} errors), skipped {counts['skipped']} already done.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
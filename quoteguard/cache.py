@@ -0,0 +1,102 @@
+# ==============================
+# QuoteGuard – Extraction Cache
+# ==============================
+# Content-addressed, disk-backed cache for extract_data results.
+# Entries are keyed by sha256(file bytes + extractor settings), so the same
+# quote uploaded by two users (or re-uploaded after a restart) hits the cache.
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+DEFAULT_DIR = os.environ.get("QUOTEGUARD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "quoteguard", "extract"))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024   # 256 MB on disk
+DEFAULT_MAX_AGE = 30 * 24 * 3600        # 30 days
+
+
+class ExtractCache:
+    def __init__(self, root=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE, evict_every=20):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_every = evict_every
+        self._writes = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def make_key(data, settings=None):
+        h = hashlib.sha256(data)
+        h.update(json.dumps(settings or {}, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            st = os.stat(path)
+            if time.time() - st.st_mtime > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mtime doubles as last-access time for LRU eviction
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, value):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename, so concurrent sessions never read a half-written entry
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for fn in filenames:
+                path = os.path.join(dirpath, fn)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                # Expired entries and stale temp files from crashed writers go first
+                if now - st.st_mtime > self.max_age or (fn.endswith(".tmp") and now - st.st_mtime > 3600):
+                    self._remove(path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()  # least recently used first
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for fn in filenames:
+                self._remove(os.path.join(dirpath, fn))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
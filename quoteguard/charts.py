@@ -0,0 +1,47 @@
+# ==============================
+# QuoteGuard – Dashboard Charts
+# ==============================
+# Plotly figure builders; plotly is imported on first use.
+
+# ---------- GAUGE CHART ----------
+def create_gauge(score, title):
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = score,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': title, 'font': {'size': 24}},
+        gauge = {
+            'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
+            'bar': {'color': "#3b82f6"},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "gray",
+            'steps': [
+                {'range': [0, 50], 'color': '#ef4444'},
+                {'range': [50, 75], 'color': '#f59e0b'},
+                {'range': [75, 100], 'color': '#22c55e'}],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': score}}))
+    fig.update_layout(height=250, margin=dict(l=20, r=20, t=50, b=20), paper_bgcolor="rgba(0,0,0,0)")
+    return fig
+
+# ---------- DONUT CHART ----------
+def create_donut(items, labor_est):
+    import plotly.graph_objects as go
+    labels = [i['name'] for i in items] + ["Main d'oeuvre (Est.)"]
+    values = [i['cost'] for i in items] + [labor_est]
+    fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.4)])
+    fig.update_layout(height=250, margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor="rgba(0,0,0,0)", showlegend=False)
+    return fig
+
+# ---------- REGION BARS ----------
+def create_region_bars(table, price, current):
+    import plotly.graph_objects as go
+    colors = ["#1f77b4" if r == current else "#aab7c4" for r in table.index]
+    fig = go.Figure(data=[go.Bar(x=list(table.index), y=table["fair"].tolist(), marker_color=colors)])
+    fig.add_hline(y=price, line_dash="dash", line_color="red")
+    fig.update_layout(height=280, margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor="rgba(0,0,0,0)", showlegend=False)
+    return fig
@@ -0,0 +1,76 @@
+# ==============================
+# QuoteGuard – All-Regions Comparison
+# ==============================
+# The catalog x REGIONS price table is precomputed once as a NumPy matrix
+# (one row per catalog item, one column per region). Scoring a quote against
+# every region is then a single indexed column sum, instead of re-running the
+# pipeline once per region.
+
+import threading
+
+from quoteguard.engine import DEFAULT_PRICE, REGIONS, RISK_THRESHOLD
+from quoteguard.market import get_market
+from quoteguard.pricing import get_matcher
+
+STANDARD_ESTIMATE = 1500    # same fallback as calculate_smart_fair_price
+
+_matrix = None
+_lock = threading.Lock()
+
+
+class PriceMatrix:
+    def __init__(self, catalog, regions):
+        import numpy as np
+        names = list(dict.fromkeys(e["name"] for e in catalog))
+        cost = {}
+        for e in catalog:
+            cost.setdefault(e["name"], e["cost"])
+        self.names = names
+        self.row = {n: i for i, n in enumerate(names)}
+        self.regions = list(regions)
+        self.multipliers = np.array([regions[r] for r in self.regions], dtype=float)
+        self.costs = np.outer(np.array([cost[n] for n in names], dtype=float), self.multipliers)
+
+    def fair_prices(self, item_names, market=None):
+        """Fair price of the given items in every region (1-D array, one value per region)."""
+        import numpy as np
+        idx = [self.row[n] for n in item_names if n in self.row]
+        if not idx:
+            return STANDARD_ESTIMATE * self.multipliers
+        block = self.costs[idx]     # fancy indexing copies, so overrides stay local
+        if market is not None:
+            # learned medians override catalog cells that have enough samples
+            for i, name in enumerate(n for n in item_names if n in self.row):
+                for j, region in enumerate(self.regions):
+                    learned = market.fair_cost(name, region)
+                    if learned is not None:
+                        block[i, j] = learned
+        return block.sum(axis=0)
+
+
+def get_price_matrix():
+    global _matrix
+    with _lock:
+        if _matrix is None:
+            _matrix = PriceMatrix(get_matcher().catalog, REGIONS)
+    return _matrix
+
+
+def compare_regions(items, price):
+    """Score one quote against every region at once.
+    items: detected items from calculate_smart_fair_price; price: quoted amount.
+    Returns a DataFrame indexed by region with fair, diff, markup, score and risk."""
+    import numpy as np
+    import pandas as pd
+
+    m = get_price_matrix()
+    names = [i["name"] for i in items if i["name"] in m.row]
+    price = price or DEFAULT_PRICE
+    fair = m.fair_prices(names, get_market())
+    diff = price - fair
+    markup = np.trunc(diff / fair * 100).astype(int)    # same rounding as trust_score
+    score = np.clip(100 - markup, 0, 100)
+    return pd.DataFrame({
+        "fair": fair.round(2), "diff": diff.round(2), "markup": markup, "score": score,
+        "risk": np.where(score < RISK_THRESHOLD, "HIGH", "FAIR"),
+    }, index=pd.Index(m.regions, name="region"))
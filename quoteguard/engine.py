@@ -0,0 +1,247 @@
+# ==============================
+# QuoteGuard – Audit Engine
+# ==============================
+# UI-free audit logic shared by app.py and the batch CLI.
+# Importing this module is cheap: pdfplumber, PIL, pytesseract, requests and
+# fpdf are only loaded the first time a quote is extracted, verified or rendered.
+
+import hashlib
+import time
+
+from quoteguard.cache import ExtractCache
+from quoteguard.extraction import IngestLimit, iter_pages
+from quoteguard.market import get_market, peek_market
+from quoteguard.metrics import REGISTRY, listen, record_stage, stage
+from quoteguard.parser import ParsedQuote, QuoteParser
+from quoteguard.pricing import get_matcher
+from quoteguard.report import create_pdf, render_report
+from quoteguard.similarity import get_index, summarize
+from quoteguard.siret_client import SiretClient
+from quoteguard.store import get_store
+
+__all__ = [
+    "REGIONS", "DEFAULT_PRICE", "RISK_THRESHOLD", "MIME_TYPES", "IngestLimit", "ExtractionFailed",
+    "extract_quote", "extract_bytes", "extract_details", "extract_data", "calculate_smart_fair_price", "check_siret",
+    "trust_score", "audit", "create_pdf", "render_report", "market_index", "record_audit", "match_quote",
+]
+
+REGIONS = {
+    "Paris & Île-de-France": 1.0,
+    "Lyon / Rhône-Alpes": 0.90,
+    "Nice / Côte d'Azur": 0.95,
+    "Bordeaux / Gironde": 0.85,
+    "Marseille / PACA": 0.85,
+    "Lille / Nord": 0.80,
+    "Rest of France (Rural)": 0.70
+}
+
+# Bump EXTRACTOR_VERSION whenever the extraction logic changes, so stale cache entries are ignored
+EXTRACTOR_VERSION = 5
+# dpi: full-resolution OCR target; layout_dpi: fast layout pass; roi: OCR only around total/SIRET
+OCR_SETTINGS = {"lang": "eng", "config": "", "dpi": 300, "layout_dpi": 150, "roi": True}
+DEFAULT_PRICE = 1500.0      # used when no total could be read from the quote
+RISK_THRESHOLD = 60         # scores below this are flagged HIGH RISK
+
+MIME_TYPES = {".pdf": "application/pdf", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+# Process-wide singletons, shared by every Streamlit session / batch task in this process
+_extract_cache = None
+_siret_client = None
+
+
+def get_extract_cache():
+    global _extract_cache
+    if _extract_cache is None:
+        _extract_cache = ExtractCache()
+    return _extract_cache
+
+
+def get_siret_client():
+    global _siret_client
+    if _siret_client is None:
+        _siret_client = SiretClient()
+    return _siret_client
+
+
+class ExtractionFailed(RuntimeError):
+    """Raised when a quote could not be read at all, as opposed to read with no total on it."""
+
+
+EMPTY_EXTRACT = {"amount": 0.0, "siret": None, "text": "", "quote_hash": None, "parsed": ParsedQuote().to_dict()}
+
+
+def extract_quote(data, mime, on_page=None):
+    """Extract and parse one quote. Returns {"amount", "siret", "text", "quote_hash", "parsed"} where
+    parsed is ParsedQuote.to_dict() (line items and HT/TVA/TTC totals).
+    Raises IngestLimit if the quote is over the size caps; other failures give EMPTY_EXTRACT
+    plus an "error" message, and are not cached."""
+    try:
+        cache = get_extract_cache()
+        key = ExtractCache.make_key(data, {"v": EXTRACTOR_VERSION, "type": mime, "ocr": OCR_SETTINGS})
+        hit = cache.get(key)
+        REGISTRY.inc("quoteguard_extract_cache_total", 1, "Extraction cache lookups", result="hit" if hit else "miss")
+        if hit:
+            return hit
+
+        # Pages are parsed as they come off the extraction engine; the parser never holds more
+        # than the current line. The joined text is still kept in the (cached) result: it is
+        # what extract_data()/extract_bytes() return, and the near-duplicate signature and the
+        # catalog match are computed from it again when a cached quote is re-scored.
+        parser = QuoteParser()
+        pages = []
+        parse_seconds = 0.0
+        for page in iter_pages(data, mime, OCR_SETTINGS, on_page):
+            start = time.perf_counter()
+            parser.feed(page)
+            parse_seconds += time.perf_counter() - start
+            pages.append(page)
+        record_stage("parse", parse_seconds)
+        parsed = parser.result()
+
+        result = {"amount": parsed.amount, "siret": parsed.siret, "text": "\n".join(pages),
+                  "quote_hash": hashlib.sha256(data).hexdigest(), "parsed": parsed.to_dict()}
+        cache.put(key, result)
+        return result
+    except IngestLimit:
+        raise
+    except Exception as e:
+        return {**EMPTY_EXTRACT, "error": f"{type(e).__name__}: {e}"}
+
+
+def extract_bytes(data, mime, on_page=None):
+    r = extract_quote(data, mime, on_page)
+    return r["amount"], r["siret"], r["text"]
+
+
+def extract_details(file, on_page=None):
+    # file: a Streamlit UploadedFile (or anything with .getvalue() and .type)
+    with stage("file_read"):
+        data = file.getvalue()
+    return extract_quote(data, file.type, on_page)
+
+
+def extract_data(file, on_page=None):
+    r = extract_details(file, on_page)
+    return r["amount"], r["siret"], r["text"]
+
+
+def calculate_smart_fair_price(text, region_multiplier, lines=None, region=None):
+    """Estimate a fair price from the catalog items found in text.
+    If the parsed line items are given, each detected item also gets the
+    amount quoted for it ("quoted"), so prices can be compared line by line.
+    If the region name is given, prices learned from past audits in that
+    region replace the static catalog cost once there are enough of them."""
+    matcher = get_matcher()
+    market = get_market() if region else None
+    items_found = []
+    running_total = 0
+    for data in matcher.match(text):
+        learned = market.fair_cost(data['name'], region) if market else None
+        local_cost = learned if learned is not None else data['cost'] * region_multiplier
+        items_found.append({"name": data['name'], "cost": local_cost, "source": "market" if learned is not None else "catalog"})
+        running_total += local_cost
+
+    if lines and items_found:
+        by_name = {i["name"]: i for i in items_found}
+        for line in lines:
+            for entry in matcher.match(line["label"]):
+                item = by_name.get(entry["name"])
+                if item is not None:
+                    item["quoted"] = item.get("quoted", 0.0) + line["total"]
+                    break
+
+    if running_total == 0:
+        running_total = 1500 * region_multiplier
+        items_found.append({"name": "Estimation Standard", "cost": running_total})
+        
+    return running_total, items_found
+
+
+def market_index():
+    """Average deviation (%) of learned regional prices from the catalog, or None without data.
+    Also None while the benchmark is still being built in the background."""
+    market = peek_market()
+    if market is None:
+        return None
+    costs = {(e["name"], r): e["cost"] * m for e in get_matcher().catalog for r, m in REGIONS.items()}
+    return market.index_vs(costs)
+
+
+def record_audit(audit):
+    """Persist a finished audit and feed its line prices to the market benchmark (once per quote)."""
+    get_store().record(audit)
+    get_market().observe_audit(audit.get("region"), audit.get("items") or [], audit.get("quote_hash"))
+
+
+def check_siret(siret):
+    with stage("siret_lookup"):
+        result = get_siret_client().lookup(siret)
+    REGISTRY.inc("quoteguard_siret_lookups_total", 1, "SIRET lookups by resulting status", status=result[1])
+    return result
+
+
+COMPANY_REUSE_AGE = 7 * 24 * 3600     # a near-duplicate's company lookup is reused for this long
+
+
+def match_quote(details, verify_siret=True):
+    """Company lookup for an extracted quote, via the near-duplicate index.
+    If an earlier version of this quote (same text up to numbers/dates) was audited
+    recently for the same SIRET, its company lookup is reused instead of calling the
+    registry. The quote is then added to the index. Returns (company, previous) where
+    company is check_siret()'s tuple or None and previous a similarity.Match or None."""
+    index, sig, previous = get_index(), None, None
+    if details["text"]:
+        with stage("dedup"):
+            sig = index.signature(details["text"])
+            matches = index.query(sig, limit=1) if sig is not None else []
+        previous = matches[0] if matches else None
+        REGISTRY.inc("quoteguard_dedup_total", 1, "Quotes looked up in the near-duplicate index", result="seen" if previous else "new")
+
+    company, siret = None, details["siret"]
+    if siret and verify_siret:
+        company = previous.company_for(siret, COMPANY_REUSE_AGE) if previous else None
+        if company:
+            REGISTRY.inc("quoteguard_siret_lookups_total", 1, "SIRET lookups by resulting status", status="reused")
+        else:
+            company = check_siret(siret)
+    if sig is not None:
+        index.add(details["quote_hash"], sig, summarize(details, company))
+    return company, previous
+
+
+def trust_score(price, fair):
+    # Trust Score (0-100): 100 minus the markup over the smart estimate, in percent
+    diff = price - fair
+    markup = int(((price - fair) / fair) * 100)
+    score = max(0, min(100, 100 - markup))
+    return diff, markup, score
+
+
+def audit(data, mime, region, verify_siret=True):
+    """Run the full audit on one quote's bytes and return a flat result dict.
+    Raises ExtractionFailed rather than scoring a quote that could not be read."""
+    timings = {}
+    def collect(name, seconds):
+        timings[name] = timings.get(name, 0.0) + seconds
+
+    with listen(collect):
+        x = extract_quote(data, mime)
+        if x.get("error"):
+            raise ExtractionFailed(x["error"])
+        price, siret, text, parsed = x["amount"], x["siret"], x["text"], x["parsed"]
+        company, previous = match_quote(x, verify_siret)
+        name, status, addr = company or ("Unknown", "CHECK", "")
+        if price == 0: price = DEFAULT_PRICE
+        with stage("scoring"):
+            fair, items = calculate_smart_fair_price(text, REGIONS[region], parsed["items"], region)
+            diff, markup, score = trust_score(price, fair)
+    return {
+        "quote_hash": x["quote_hash"], "timings": timings,
+        "siret": siret, "company": name, "siret_status": status, "address": addr,
+        "region": region, "price": price, "fair": fair, "diff": diff, "markup": markup,
+        "score": score, "risk": "HIGH" if score < RISK_THRESHOLD else "FAIR",
+        "total_ht": parsed["total_ht"], "tva": parsed["tva"], "total_ttc": parsed["total_ttc"],
+        "line_items": parsed["items"], "items": items, "text": text,
+        "previous_hash": previous.quote_hash if previous else None,
+        "similarity": round(previous.similarity, 3) if previous else None,
+    }
@@ -0,0 +1,197 @@
+# ==============================
+# QuoteGuard – Extraction Engine
+# ==============================
+# Per-page PDF extraction on a bounded process pool. Each page uses its
+# pdfplumber text layer when it has one; only pages without usable text are
+# rasterised and sent through tesseract. Results are joined in page order.
+#
+# Memory stays bounded whatever the document size: pages are processed and
+# closed one at a time (pdfplumber otherwise keeps every page's layout
+# cached), at most PAGE_WINDOW pages are in flight on the pool, and uploads
+# over MAX_BYTES / MAX_PAGES / MAX_PIXELS are refused before any decoding.
+
+import atexit
+import os
+import threading
+import time
+
+from quoteguard.metrics import record_stage, stage
+from quoteguard.ocr import ocr_image
+
+MAX_WORKERS = int(os.environ.get("QUOTEGUARD_WORKERS", min(8, os.cpu_count() or 1)))
+MIN_TEXT_CHARS = 20     # fewer characters than this = no usable text layer, OCR the page
+OCR_RESOLUTION = 300    # DPI used to rasterise scanned pages
+MAX_BYTES = int(os.environ.get("QUOTEGUARD_MAX_BYTES", 50 * 1024 * 1024))
+MAX_PAGES = int(os.environ.get("QUOTEGUARD_MAX_PAGES", 200))
+MAX_PIXELS = int(os.environ.get("QUOTEGUARD_MAX_PIXELS", 50_000_000))    # per image / rasterised page
+PAGE_WINDOW = 2         # pages in flight per worker
+
+_pool = None
+_pool_lock = threading.Lock()
+_doc = None             # (path, pdfplumber document) kept open per worker process
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn: the Streamlit server is multi-threaded, forking it is unsafe
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def discard_pool(pool):
+    """Drop a broken pool so the next get_pool() starts a fresh one. A worker that dies
+    (OOM on a huge scan, a native crash) breaks the whole ProcessPoolExecutor for good."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:       # another thread may already have replaced it
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class IngestLimit(ValueError):
+    """A quote is over one of the size caps. limit is "bytes", "pages" or "pixels";
+    value and maximum are in MB, pages and megapixels respectively."""
+
+    UNITS = {"bytes": ("MB", 1024 * 1024), "pages": ("pages", 1), "pixels": ("MP", 1_000_000)}
+
+    def __init__(self, limit, value, maximum):
+        unit, scale = self.UNITS[limit]
+        self.limit = limit
+        self.value = round(value / scale, 1)
+        self.maximum = round(maximum / scale, 1)
+        super().__init__(f"quote is too large: {self.value:g} {unit}, the limit is {self.maximum:g} {unit}")
+
+
+def check_limit(limit, value):
+    maximum = {"bytes": MAX_BYTES, "pages": MAX_PAGES, "pixels": MAX_PIXELS}[limit]
+    if value > maximum:
+        raise IngestLimit(limit, value, maximum)
+
+
+def page_text(page, ocr):
+    """Return (text, timings); timings are (stage, seconds) pairs for the caller to record."""
+    start = time.perf_counter()
+    text = page.extract_text() or ""
+    timings = [("text_layer", time.perf_counter() - start)]
+    if len(text.strip()) >= MIN_TEXT_CHARS:
+        return text, timings
+    start = time.perf_counter()
+    # Oversized pages (plans, posters) are rasterised at a lower DPI rather than refused
+    points = float(page.width) * float(page.height)
+    dpi = min(OCR_RESOLUTION, int(72 * (MAX_PIXELS / points) ** 0.5))
+    image = page.to_image(resolution=dpi).original
+    text = ocr_image(image, ocr, source_dpi=dpi)
+    del image
+    timings.append(("ocr", time.perf_counter() - start))
+    return text, timings
+
+
+def _open_doc(path):
+    global _doc
+    import pdfplumber
+    if _doc is None or _doc[0] != path:
+        if _doc is not None:
+            _doc[1].close()
+        _doc = (path, pdfplumber.open(path))
+    return _doc[1]
+
+
+def _page_task(path, index, ocr):
+    pdf = _open_doc(path)
+    page = pdf.pages[index]
+    try:
+        text, timings = page_text(page, ocr)
+    finally:
+        page.close()
+    return index, text, timings
+
+
+def iter_pdf_pages(data, ocr, on_page=None):
+    """Yield the text of each page of a PDF (given as bytes), in page order.
+    on_page(done, total) is called as each page finishes."""
+    import io
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        total = len(pdf.pages)
+        check_limit("pages", total)
+        if total <= 1 or MAX_WORKERS <= 1:
+            for i, p in enumerate(pdf.pages):
+                try:
+                    text, timings = page_text(p, ocr)
+                finally:
+                    p.close()   # drop the page's layout/char caches before the next one
+                for name, secs in timings: record_stage(name, secs, page=i)
+                if on_page: on_page(i + 1, total)
+                yield text
+            return
+
+    import tempfile
+    from concurrent.futures import FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    # Workers open the document from a temp file, so the bytes are not pickled once per page
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    pending = {}    # future -> page index
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        pool = get_pool()
+        ready = {}
+        submitted = next_index = done = 0
+        retried = False
+        while next_index < total:
+            try:
+                # keep a bounded window of pages ahead of the one we are waiting for
+                while submitted < total and submitted < next_index + PAGE_WINDOW * MAX_WORKERS:
+                    if submitted not in ready:
+                        pending[pool.submit(_page_task, path, submitted, ocr)] = submitted
+                    submitted += 1
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    index, text, timings = fut.result()
+                    del pending[fut]
+                    ready[index] = text
+                    for name, secs in timings: record_stage(name, secs, page=index)
+                    done += 1
+                    if on_page: on_page(done, total)
+            except BrokenProcessPool:
+                # start a fresh pool and resubmit the pages not finished yet; a page that
+                # kills its worker twice fails the document
+                discard_pool(pool)
+                if retried:
+                    raise
+                retried = True
+                pool = get_pool()
+                pending.clear()
+                submitted = next_index
+                continue
+            # pages finish out of order; hand them on as soon as the next one in sequence is in
+            while next_index in ready:
+                yield ready.pop(next_index)
+                next_index += 1
+    finally:
+        for fut in pending: fut.cancel()
+        os.remove(path)
+
+
+def iter_pages(data, mime, ocr, on_page=None):
+    """Yield the text of each page of a quote. Raises IngestLimit for oversized input."""
+    check_limit("bytes", len(data))
+    if mime == "application/pdf":
+        yield from iter_pdf_pages(data, ocr, on_page)
+        return
+    import io
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))     # reads the header only
+    check_limit("pixels", image.size[0] * image.size[1])
+    with stage("ocr"):
+        text = ocr_image(image, ocr)
+    image.close()
+    if on_page: on_page(1, 1)
+    yield text
@@ -0,0 +1,211 @@
+# ==============================
+# QuoteGuard – Background Audit Jobs
+# ==============================
+# Extraction, OCR and the SIRET lookup run on a bounded pool of worker threads
+# instead of the Streamlit script thread, so a slow scanned quote never blocks
+# rendering. Threads are enough: PDF pages are fanned out to the extraction
+# process pool and tesseract runs as a subprocess, so throughput follows the
+# number of cores rather than the number of sessions.
+#
+#   queue = get_queue()
+#   job = queue.submit(session_id, extract_job, data, mime)   # raises QueueFull
+#   job = queue.get(job.id)                                     # poll; None once forgotten
+#   job.status, job.progress, job.result, job.error / job.exception
+#
+# Polling with get() doubles as a heartbeat: a job whose page has stopped
+# polling for ORPHAN_AFTER seconds (tab closed, session expired) is cancelled
+# the next time a job is submitted, polled or finishes.
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from quoteguard.metrics import REGISTRY, listen, trace
+
+WORKERS = int(os.environ.get("QUOTEGUARD_JOB_WORKERS", 0)) or os.cpu_count() or 2
+MAX_PENDING = int(os.environ.get("QUOTEGUARD_JOB_QUEUE", 0)) or 4 * WORKERS
+ORPHAN_AFTER = 60.0     # seconds without a poll before a job is cancelled
+KEEP_FINISHED = 600.0   # seconds a finished job stays retrievable
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class QueueFull(RuntimeError):
+    """Raised by JobQueue.submit when every worker is busy and the backlog is full."""
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, owner, fn, args, kwargs):
+        self.id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.status = QUEUED
+        self.stage = None           # last audit stage completed
+        self.progress = (0, 0)      # (pages done, total pages)
+        self.timings = {}
+        self.result = None
+        self.error = None
+        self.exception = None
+        self.submitted = self.last_poll = time.monotonic()
+        self.started = self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        """Raise Cancelled if the job has been cancelled; call between steps of long work."""
+        if self._cancel.is_set():
+            raise Cancelled(self.id)
+
+    def on_page(self, done, total):
+        self.check()
+        self.progress = (done, total)
+
+    def on_stage(self, name, seconds):
+        self.stage = name
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+class JobQueue:
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING, orphan_after=ORPHAN_AFTER, keep_finished=KEEP_FINISHED):
+        self.workers = workers
+        self.capacity = workers + max_pending
+        self.orphan_after = orphan_after
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="quoteguard-job")
+        self._jobs = {}     # id -> Job, in submission order
+        self._lock = threading.Lock()
+
+    def _active(self):
+        return [j for j in self._jobs.values() if not j.done]
+
+    def has_room(self):
+        with self._lock:
+            self._reap()
+            return len(self._active()) < self.capacity
+
+    def submit(self, owner, fn, *args, **kwargs):
+        """Queue fn(job, *args, **kwargs) and return its Job. Raises QueueFull when saturated."""
+        with self._lock:
+            self._reap()
+            if len(self._active()) >= self.capacity:
+                REGISTRY.inc("quoteguard_jobs_total", 1, "Background jobs, by outcome", outcome="rejected")
+                raise QueueFull(f"{self.capacity} audits already queued or running")
+            job = Job(owner, fn, args, kwargs)
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        if job.cancelled:
+            self._finish(job, CANCELLED)
+            return
+        job.status, job.started = RUNNING, time.monotonic()
+        REGISTRY.observe("quoteguard_job_wait_seconds", job.started - job.submitted, "Time jobs spent queued")
+        try:
+            with trace(job.id), listen(job.on_stage):
+                result = job.fn(job, *job.args, **job.kwargs)
+            job.check()
+            job.result = result
+            self._finish(job, DONE)
+        except Cancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.exception = e
+            job.error = f"{type(e).__name__}: {e}"
+            self._finish(job, FAILED)
+
+    def _finish(self, job, status):
+        job.finished = time.monotonic()
+        job.status = status
+        job.fn = job.args = job.kwargs = None     # release the uploaded bytes
+        REGISTRY.inc("quoteguard_jobs_total", 1, "Background jobs, by outcome", outcome=status)
+        # reap here too, so queued orphans are cancelled before a worker picks them up
+        # even when no other session is submitting or polling
+        with self._lock:
+            self._reap()
+
+    def get(self, job_id):
+        """Return the job (and record that its owner is still polling), or None if unknown."""
+        with self._lock:
+            self._reap()
+            job = self._jobs.get(job_id)
+        if job is not None:
+            job.last_poll = time.monotonic()
+        return job
+
+    def position(self, job):
+        """Number of unfinished jobs, queued or running, submitted before this one (0 once it is running)."""
+        if job.status != QUEUED:
+            return 0
+        with self._lock:
+            ahead = 0
+            for j in self._jobs.values():
+                if j is job:
+                    break
+                ahead += not j.done
+        return ahead
+
+    def cancel_owner(self, owner):
+        """Cancel every job the owner still has queued or running."""
+        with self._lock:
+            for job in self._active():
+                if job.owner == owner:
+                    job.cancel()
+
+    def _reap(self):
+        # caller holds the lock
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.done:
+                if now - job.finished > self.keep_finished:
+                    del self._jobs[job_id]
+            elif now - job.last_poll > self.orphan_after:
+                job.cancel()
+
+    def shutdown(self, wait=True):
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+    return _queue
+
+
+def extract_job(job, data, mime):
+    """Job body for an uploaded quote: extraction + company lookup.
+    Returns (details, company, previous) as extract_quote() and match_quote() do."""
+    from quoteguard.engine import ExtractionFailed, extract_quote, match_quote
+
+    # A cancel raised from on_page is caught inside extract_quote, which returns an empty
+    # (uncached) extract with an error; the check below turns that back into a cancellation.
+    details = extract_quote(data, mime, job.on_page)
+    job.check()
+    if details.get("error"):
+        raise ExtractionFailed(details["error"])
+    company, previous = match_quote(details)
+    return details, company, previous
@@ -0,0 +1,214 @@
+# ==============================
+# QuoteGuard – Market Benchmark
+# ==============================
+# Learns what each catalog item actually costs per region from the line
+# prices of past audits. Every (item, region) pair keeps a count, a running
+# mean and a mergeable quantile sketch (log-spaced buckets with ~2% relative
+# error, DDSketch-style), all updated in O(1) as each audit completes.
+# The learned median replaces the static catalog cost once an item has
+# MIN_SAMPLES observations in a region; lookups are cached, so scoring cost
+# doesn't grow with history size.
+# On startup the benchmark is rebuilt from the audit store in one vectorised
+# pandas/numpy pass. Each quote (by quote_hash) is counted once, however many
+# times it is audited, so one contractor can't become the regional median.
+
+import json
+import math
+import threading
+from contextlib import closing
+
+MIN_SAMPLES = 5
+ALPHA = 0.02
+
+
+class QuantileSketch:
+    def __init__(self, alpha=ALPHA):
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.count = 0
+
+    def index(self, x):
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def add(self, x, n=1):
+        if x <= 0:
+            return
+        i = self.index(x)
+        self.buckets[i] = self.buckets.get(i, 0) + n
+        self.count += n
+
+    def add_bucket(self, i, n):
+        self.buckets[i] = self.buckets.get(i, 0) + n
+        self.count += n
+
+    def merge(self, other):
+        for i, n in other.buckets.items():
+            self.add_bucket(i, n)
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen > rank:
+                return 2 * self.gamma ** i / (self.gamma + 1)
+        return None
+
+
+class ItemStats:
+    __slots__ = ("count", "mean", "sketch", "_median")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.sketch = QuantileSketch()
+        self._median = None
+
+    def add(self, x):
+        self.count += 1
+        self.mean += (x - self.mean) / self.count
+        self.sketch.add(x)
+        self._median = None
+
+    def merge(self, other):
+        total = self.count + other.count
+        if total:
+            self.mean = (self.mean * self.count + other.mean * other.count) / total
+        self.count = total
+        self.sketch.merge(other.sketch)
+        self._median = None
+        return self
+
+    @property
+    def median(self):
+        if self._median is None:
+            self._median = self.sketch.quantile(0.5)
+        return self._median
+
+    def summary(self):
+        q = self.sketch.quantile
+        return {"count": self.count, "mean": self.mean, "p25": q(0.25), "p50": self.median, "p75": q(0.75), "p90": q(0.9)}
+
+
+class MarketBenchmark:
+    def __init__(self, min_samples=MIN_SAMPLES):
+        self.min_samples = min_samples
+        self.stats = {}     # (item name, region) -> ItemStats
+        self.seen = set()   # quote_hash prefixes already observed
+        self._lock = threading.Lock()
+
+    def observe(self, item, region, price):
+        if not price or price <= 0:
+            return
+        with self._lock:
+            s = self.stats.get((item, region))
+            if s is None:
+                s = self.stats[(item, region)] = ItemStats()
+            s.add(price)
+
+    def observe_audit(self, region, items, quote_hash=None):
+        """Feed the detected items of one finished audit (only those with a quoted line price).
+        A quote_hash that was already observed is ignored."""
+        if quote_hash:
+            with self._lock:
+                if quote_hash[:16] in self.seen:
+                    return
+                self.seen.add(quote_hash[:16])
+        for i in items:
+            if i.get("quoted"):
+                self.observe(i["name"], region, i["quoted"])
+
+    def fair_cost(self, item, region):
+        """Learned median price for an item in a region, or None while there are too few samples."""
+        s = self.stats.get((item, region))
+        if s is None or s.count < self.min_samples:
+            return None
+        return s.median
+
+    def index_vs(self, catalog_costs):
+        """Sample-weighted average deviation (in %) of learned medians from catalog costs."""
+        num = den = 0.0
+        for (item, region), s in list(self.stats.items()):
+            base = catalog_costs.get((item, region))
+            if base and s.count >= self.min_samples:
+                num += s.count * (s.median / base - 1)
+                den += s.count
+        return 100 * num / den if den else None
+
+    def merge(self, other):
+        with self._lock:
+            for key, s in other.stats.items():
+                mine = self.stats.get(key)
+                if mine is None:
+                    mine = self.stats[key] = ItemStats()
+                mine.merge(s)
+            self.seen |= other.seen
+        return self
+
+    def summary(self):
+        return {f"{item} | {region}": s.summary() for (item, region), s in sorted(self.stats.items())}
+
+    @classmethod
+    def from_store(cls, store, min_samples=MIN_SAMPLES):
+        """Rebuild from every audit in the store in one vectorised pass (the first audit of each quote)."""
+        import numpy as np
+        import pandas as pd
+
+        market = cls(min_samples)
+        with closing(store.connect()) as db:
+            df = pd.read_sql_query("""
+                SELECT region, items, quote_hash FROM audits WHERE id IN (
+                    SELECT MIN(id) FROM audits WHERE items LIKE '%"quoted"%' GROUP BY COALESCE(quote_hash, id))""", db)
+        if df.empty:
+            return market
+        market.seen = {h[:16] for h in df["quote_hash"].dropna()}
+        df["items"] = df["items"].map(json.loads)
+        df = df.explode("items", ignore_index=True).dropna(subset=["items"])
+        flat = pd.json_normalize(df["items"].tolist())
+        if "quoted" not in flat:
+            return market
+        flat["region"] = df["region"].to_numpy()
+        flat = flat[flat["quoted"].fillna(0) > 0]
+        if flat.empty:
+            return market
+
+        proto = QuantileSketch()
+        flat["bucket"] = np.ceil(np.log(flat["quoted"].to_numpy(dtype=float)) / proto._log_gamma).astype(int)
+        moments = flat.groupby(["name", "region"])["quoted"].agg(["count", "mean"])
+        buckets = flat.groupby(["name", "region", "bucket"]).size()
+        for (name, region), row in moments.iterrows():
+            s = market.stats[(name, region)] = ItemStats()
+            s.count, s.mean = int(row["count"]), float(row["mean"])
+        for (name, region, bucket), n in buckets.items():
+            market.stats[(name, region)].sketch.add_bucket(int(bucket), int(n))
+        return market
+
+
+_market = None
+_market_lock = threading.Lock()
+_warming = threading.Lock()
+
+
+def get_market():
+    """Process-wide benchmark, rebuilt from the audit store on first use (blocks until built)."""
+    global _market
+    with _market_lock:
+        if _market is None:
+            from quoteguard.store import get_store
+            try:
+                _market = MarketBenchmark.from_store(get_store())
+            except Exception:
+                _market = MarketBenchmark()
+    return _market
+
+
+def peek_market():
+    """The benchmark if it is already built, else None. Starts the rebuild on a background
+    thread, so a page render never waits on pandas or a full scan of the audit store."""
+    if _market is None and _warming.acquire(blocking=False):
+        threading.Thread(target=get_market, name="quoteguard-market-build", daemon=True).start()
+    return _market
@@ -0,0 +1,170 @@
+# ==============================
+# QuoteGuard – Stage Metrics & Tracing
+# ==============================
+# Every audit stage (file read, text layer, OCR, regex parse, SIRET lookup,
+# scoring, chart build, PDF render) is timed with `stage(name)`. Each timing:
+#   - feeds a histogram + counter, exported in Prometheus text format
+#     (set QUOTEGUARD_METRICS_PORT to serve them on http://<host>:<port>/metrics)
+#   - is logged as one JSON line on the "quoteguard.trace" logger
+#     (set QUOTEGUARD_TRACE_LOG to also append them to a file)
+#   - is sent to any listener registered with `listen()`, which is what drives
+#     the Streamlit progress bar.
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+log = logging.getLogger("quoteguard.trace")
+
+_audit_id = contextvars.ContextVar("quoteguard_audit_id", default=None)
+_listeners = contextvars.ContextVar("quoteguard_listeners", default=())
+
+
+def _labels(labels):
+    return ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}      # (name, labels) -> value
+        self.histograms = {}    # (name, labels) -> [bucket counts..., sum, count]
+        self.help = {}
+
+    def inc(self, name, value=1, help="", **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.help.setdefault(name, ("counter", help))
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, help="", **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.help.setdefault(name, ("histogram", help))
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [0] * (len(BUCKETS) + 2)
+            for i, b in enumerate(BUCKETS):
+                if value <= b:
+                    h[i] += 1
+            h[-2] += value
+            h[-1] += 1
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (kind, help) in sorted(self.help.items()):
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for (n, labels), v in sorted(self.counters.items()):
+                        if n == name:
+                            lines.append(f"{name}{{{labels}}} {v}" if labels else f"{name} {v}")
+                else:
+                    for (n, labels), h in sorted(self.histograms.items()):
+                        if n != name:
+                            continue
+                        sep = "," if labels else ""
+                        for b, c in zip(BUCKETS, h):
+                            lines.append(f'{name}_bucket{{{labels}{sep}le="{b}"}} {c}')
+                        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {h[-1]}')
+                        lines.append(f"{name}_sum{{{labels}}} {h[-2]:.6f}")
+                        lines.append(f"{name}_count{{{labels}}} {h[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def record_stage(name, seconds, outcome="ok", **fields):
+    REGISTRY.observe("quoteguard_stage_seconds", seconds, "Time spent per audit stage", stage=name)
+    REGISTRY.inc("quoteguard_stage_total", 1, "Audit stages run, by outcome", stage=name, outcome=outcome)
+    if log.isEnabledFor(logging.INFO):
+        log.info(json.dumps({"ts": round(time.time(), 3), "audit": _audit_id.get(), "stage": name,
+                             "seconds": round(seconds, 6), "outcome": outcome, **fields}, default=str))
+    for fn in _listeners.get():
+        fn(name, seconds)
+
+
+@contextmanager
+def stage(name, **fields):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        record_stage(name, time.perf_counter() - start, "error", **fields)
+        raise
+    record_stage(name, time.perf_counter() - start, **fields)
+
+
+@contextmanager
+def trace(audit_id=None):
+    """Tag every stage logged inside the block with one audit id."""
+    token = _audit_id.set(audit_id or uuid.uuid4().hex[:12])
+    try:
+        yield _audit_id.get()
+    finally:
+        _audit_id.reset(token)
+
+
+@contextmanager
+def listen(fn):
+    """Call fn(stage, seconds) whenever a stage completes inside the block (same thread/context)."""
+    token = _listeners.set(_listeners.get() + (fn,))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+
+# ---------- EXPORT ----------
+_server = None
+_started = threading.Lock()
+
+
+def start_http_server(port, host="0.0.0.0"):
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200 if self.path.startswith("/metrics") else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _started:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def configure_from_env():
+    # Idempotent: safe to call on every Streamlit rerun
+    port = os.environ.get("QUOTEGUARD_METRICS_PORT")
+    if port and _server is None:
+        try:
+            start_http_server(int(port))
+        except OSError:
+            pass    # another server process already owns the port
+    path = os.environ.get("QUOTEGUARD_TRACE_LOG")
+    if path and not any(getattr(h, "baseFilename", None) == os.path.abspath(path) for h in log.handlers):
+        handler = logging.FileHandler(path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
@@ -0,0 +1,154 @@
+# ==============================
+# QuoteGuard – OCR Preprocessing & Regions of Interest
+# ==============================
+# Phone photos are often 12+ MP, rotated and in colour, which makes tesseract
+# slow and less accurate. Images go through:
+#   1. EXIF-aware rotation, JPEG draft decoding and downscaling to a target DPI
+#   2. grayscale + Otsu binarisation
+#   3. a fast low-resolution layout pass (image_to_data) that gives the page
+#      text and the word boxes
+#   4. full-resolution OCR only on the bands around "Total/Montant/TTC" and
+#      "SIRET", where the digits we parse live
+# If the layout pass finds no anchor, the whole page is OCR'd at full resolution.
+
+import re
+import unicodedata
+
+A4_LONG_SIDE_IN = 11.69
+ANCHORS = re.compile(r"^(total|montant|ttc|net|siret|siren)\b")
+DEFAULTS = {"dpi": 300, "layout_dpi": 150, "roi": True}
+
+
+def _settings(ocr):
+    return {**DEFAULTS, **{k: v for k, v in ocr.items() if k in DEFAULTS}}
+
+
+def estimate_dpi(image):
+    # Photos carry meaningless DPI metadata (usually 72), so assume the page fills the frame
+    return max(image.size) / A4_LONG_SIDE_IN
+
+
+def prepare(image, target_dpi, source_dpi=None):
+    """Rotate, downscale to target_dpi and convert to grayscale."""
+    from PIL import ImageOps
+
+    dpi = source_dpi or estimate_dpi(image)
+    scale = min(1.0, target_dpi / dpi)
+    if scale < 1.0 and image.format == "JPEG":
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 size instead of the full 12 MP
+        image.draft("L", (int(image.size[0] * scale), int(image.size[1] * scale)))
+        scale = min(1.0, target_dpi / (source_dpi or estimate_dpi(image)))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L")
+    if scale < 1.0:
+        image = image.resize((max(1, int(image.size[0] * scale)), max(1, int(image.size[1] * scale))), reducing_gap=2.0)
+    return image
+
+
+def otsu_threshold(image):
+    hist = image.histogram()[:256]
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    sum_bg = weight_bg = 0
+    best, threshold = -1.0, 127
+    for i, h in enumerate(hist):
+        weight_bg += h
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * h
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best, threshold = between, i
+    return threshold
+
+
+def binarize(image):
+    threshold = otsu_threshold(image)
+    return image.point(lambda p: 255 if p > threshold else 0, mode="1").convert("L")
+
+
+def _norm(word):
+    word = unicodedata.normalize("NFKD", word.lower())
+    return "".join(c for c in word if c.isalnum())
+
+
+def layout_pass(image, ocr):
+    """Return (lines, anchor line boxes) from one OCR pass over a low-resolution image;
+    lines are (text, box) pairs in reading order."""
+    import pytesseract
+    d = pytesseract.image_to_data(image, lang=ocr.get("lang", "eng"), config=ocr.get("config", ""),
+                                  output_type=pytesseract.Output.DICT)
+    lines = {}
+    for i, word in enumerate(d["text"]):
+        if not word.strip():
+            continue
+        key = (d["block_num"][i], d["par_num"][i], d["line_num"][i])
+        box = (d["left"][i], d["top"][i], d["left"][i] + d["width"][i], d["top"][i] + d["height"][i])
+        words, lb = lines.get(key, ([], None))
+        words.append(word)
+        lb = box if lb is None else (min(lb[0], box[0]), min(lb[1], box[1]), max(lb[2], box[2]), max(lb[3], box[3]))
+        lines[key] = (words, lb)
+    ordered = []
+    anchors = []
+    for key in sorted(lines):
+        words, box = lines[key]
+        ordered.append((" ".join(words), box))
+        if any(ANCHORS.match(_norm(w)) for w in words):
+            anchors.append(box)
+    return ordered, anchors
+
+
+def roi_bands(anchors, scale, width, height):
+    """Full-width bands around each anchor line (values are often on the next line), merged."""
+    bands = []
+    for _, top, _, bottom in sorted(anchors, key=lambda b: b[1]):
+        h = bottom - top
+        y0 = max(0, int((top - 0.5 * h) * scale))
+        y1 = min(height, int((bottom + 1.5 * h) * scale))
+        if bands and y0 <= bands[-1][3]:
+            bands[-1] = (0, bands[-1][1], width, max(bands[-1][3], y1))
+        else:
+            bands.append((0, y0, width, y1))
+    return bands
+
+
+def merge_rois(lines, bands, rois, scale):
+    """Low-resolution lines in reading order, with the lines that fall inside each band
+    replaced by that band's full-resolution text, so nothing is read twice."""
+    out, placed = [], set()
+    for text, (_, top, _, bottom) in lines:
+        middle = (top + bottom) / 2 * scale
+        band = next((i for i, b in enumerate(bands) if b[1] <= middle < b[3]), None)
+        if band is None:
+            out.append(text)
+        elif band not in placed:
+            placed.add(band)
+            out.append(rois[band])
+    return out
+
+
+def ocr_image(image, ocr, source_dpi=None):
+    import pytesseract
+    s = _settings(ocr)
+    lang, config = ocr.get("lang", "eng"), ocr.get("config", "")
+
+    full = binarize(prepare(image, s["dpi"], source_dpi))
+    if not s["roi"]:
+        return pytesseract.image_to_string(full, lang=lang, config=config)
+
+    scale = s["layout_dpi"] / s["dpi"]
+    small = full.resize((max(1, int(full.size[0] * scale)), max(1, int(full.size[1] * scale))), reducing_gap=2.0) if scale < 1 else full
+    lines, anchors = layout_pass(small, ocr)
+    if not anchors:
+        return pytesseract.image_to_string(full, lang=lang, config=config)
+
+    # The total/SIRET bands are read again at full resolution and replace the low-res guess in place
+    ratio = full.size[0] / small.size[0]
+    bands = roi_bands(anchors, ratio, *full.size)
+    rois = [pytesseract.image_to_string(full.crop(b), lang=lang, config=(config + " --psm 6").strip()).strip() for b in bands]
+    return "\n".join(merge_rois(lines, bands, rois, ratio))
@@ -0,0 +1,181 @@
+# ==============================
+# QuoteGuard – Quote Parser
+# ==============================
+# Line-oriented parser for extracted quote text. Pages are fed one at a time
+# and each line is matched against a handful of precompiled patterns, giving:
+#   - typed line items (label, quantity, unit, unit price, line total, lot)
+#   - the HT / TVA / TTC totals
+#   - the contractor's SIRET
+# Amounts use French conventions: "1 234,56", "1.234,56", "1234.56 €".
+
+import re
+from dataclasses import asdict, dataclass, field
+
+_SPACE = r"[   ]"
+_SEP = r"[   .]"
+# A space only groups thousands when cents or a currency sign follow ("4 500,00", "4 500 €"):
+# otherwise "10 450" is two columns. Numbers glued to letters ("m2", "x3") are not amounts.
+AMOUNT = re.compile(r"(?<![\w,.])(\d{1,3}(?:\.\d{3})+|\d{1,3}(?:" + _SPACE + r"\d{3})+(?=[.,]\d{1,2}(?!\d)|\s*(?:€|eur\b))|\d+)"
+                    r"(?:[.,](\d{1,2}))?(?![\d%])", re.I)
+LEADING = re.compile(r"(\d{1,3})" + _SPACE + r"(.+)")
+UNIT = re.compile(r"^\s*(u|un|unit[ée]s?|ens|ensemble|ff|forfait|pce|pi[eè]ces?|m2|m²|m3|m³|ml|m|h|heures?|jours?|kg|l)\b\.?", re.I)
+SIRET = re.compile(r"(?<!\d)(\d{3}[  ]?\d{3}[  ]?\d{3}[  ]?\d{5})(?!\d)")
+LOT = re.compile(r"^\s*lot\s*(?:n[°o]\s*)?[\w.-]+\s*[:\-–]?\s*(.*)$", re.I)
+
+TOTAL_TTC = re.compile(r"\b(total|montant)\s*(g[ée]n[ée]ral\s*)?ttc\b|\bnet\s*[àa]\s*payer\b|^\s*ttc\b", re.I)
+TOTAL_HT = re.compile(r"\b(total|montant|sous[- ]total)\s*(g[ée]n[ée]ral\s*)?ht\b|\bsous[- ]total\b", re.I)
+TVA = re.compile(r"\b(tva|t\.v\.a\.?)\b", re.I)
+TOTAL = re.compile(r"\b(total|montant)\b", re.I)
+SIRET_WORD = re.compile(r"\bsiret\b", re.I)
+SKIP = re.compile(r"\b(siret|siren|t[ée]l|tel|fax|iban|bic|rcs|ape|naf|email|devis\s*n|date|page)\b", re.I)
+LETTERS = re.compile(r"[^\W\d_]{2,}")
+
+
+@dataclass
+class LineItem:
+    label: str
+    quantity: float = 1.0
+    unit: str = ""
+    unit_price: float = 0.0
+    total: float = 0.0
+    lot: str = ""
+
+
+@dataclass
+class ParsedQuote:
+    items: list = field(default_factory=list)
+    total_ht: float = None
+    tva: float = None
+    total_ttc: float = None
+    total: float = None         # first generic "Total"/"Montant" amount, as the old parser read it
+    siret: str = None
+
+    @property
+    def amount(self):
+        """Best guess at what the customer pays."""
+        if self.total_ttc is not None:
+            return self.total_ttc
+        if self.total_ht is not None:
+            return self.total_ht + (self.tva or 0.0)
+        return self.total or 0.0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def to_float(whole, cents):
+    return float(re.sub(_SEP, "", whole) + "." + (cents or "0"))
+
+
+def amounts(line):
+    """Return [(value, has_cents, start, end)] for every number in the line."""
+    return [(to_float(m.group(1), m.group(2)), m.group(2) is not None, m.start(), m.end()) for m in AMOUNT.finditer(line)]
+
+
+def split_grouped(line, nums):
+    """A quantity or unit price printed next to a space-grouped amount reads as part of it:
+    "2 450,00 900,00" is 2 x 450,00, "35 m2 12 420,00" is 35 x 12 = 420,00. Split a
+    two-amount line that way when the split is what makes it add up."""
+    for i in (0, 1):
+        _, _, start, end = nums[i]
+        m = LEADING.fullmatch(line, start, end)
+        if not m:
+            continue
+        rest, cents = amounts(m.group(2))[0][:2]
+        split = nums[:i] + [(float(m.group(1)), False, start, m.end(1)), (rest, cents, m.start(2), end)] + nums[i + 1:]
+        qty, price, total = split[0][0], split[1][0], split[2][0]
+        if total and abs(qty * price - total) <= 0.01 * total:
+            return split
+    return nums
+
+
+def parse_item(line, lot=""):
+    """Parse one priced line, or return None.
+
+    >>> parse_item("Carrelage 10 m2 450,00 4 500,00")
+    LineItem(label='Carrelage', quantity=10.0, unit='m2', unit_price=450.0, total=4500.0, lot='')
+    >>> parse_item("Fenêtre PVC 2 450,00 900,00")
+    LineItem(label='Fenêtre PVC', quantity=2.0, unit='', unit_price=450.0, total=900.0, lot='')
+    >>> parse_item("Chaudière gaz 1 2 450,00 2 450,00")
+    LineItem(label='Chaudière gaz', quantity=1.0, unit='', unit_price=2450.0, total=2450.0, lot='')
+    >>> parse_item("Peinture 35 m2 12 420,00")
+    LineItem(label='Peinture', quantity=35.0, unit='m2', unit_price=12.0, total=420.0, lot='')
+    >>> parse_item("Forfait déplacement 1 200,00 €")
+    LineItem(label='Forfait déplacement', quantity=1.0, unit='', unit_price=1200.0, total=1200.0, lot='')
+    """
+    nums = amounts(line)
+    if not nums or not nums[-1][1]:
+        return None     # a line item ends with a money amount
+    if len(nums) == 2:
+        nums = split_grouped(line, nums)
+    label = line[:nums[0][2]].strip(" .:-–\t")
+    if not LETTERS.search(label):
+        return None
+    total = nums[-1][0]
+    item = LineItem(label=label, total=total, unit_price=total, lot=lot)
+    if len(nums) >= 2:
+        qty = nums[0][0]
+        unit = UNIT.match(line[nums[0][3]:])
+        item.unit = unit.group(1).lower() if unit else ""
+        if len(nums) >= 3:
+            unit_price = nums[-2][0]
+            # some layouts print unit price before quantity
+            if qty and abs(qty * unit_price - total) > 0.05 * total and abs(unit_price * nums[-3][0] - total) <= 0.05 * total:
+                qty = nums[-3][0]
+            item.quantity, item.unit_price = qty, unit_price
+        elif qty and (unit or not nums[0][1]):
+            item.quantity, item.unit_price = qty, round(total / qty, 2)
+    return item
+
+
+class QuoteParser:
+    def __init__(self):
+        self.quote = ParsedQuote()
+        self.lot = ""
+        self._siret_labelled = False
+
+    def feed(self, page):
+        for line in page.splitlines():
+            self.feed_line(line)
+        return self
+
+    def feed_line(self, line):
+        q = self.quote
+        if not line.strip():
+            return
+        if not self._siret_labelled:
+            # a number on a "SIRET" line beats any other 14-digit run seen earlier
+            m = SIRET.search(line)
+            labelled = SIRET_WORD.search(line) is not None
+            if m and (labelled or q.siret is None):
+                q.siret = re.sub(r"\D", "", m.group(1))
+                self._siret_labelled = labelled
+        lot = LOT.match(line)
+        if lot:
+            self.lot = lot.group(1).strip() or line.strip()
+            return
+
+        ttc, ht, tva, total = TOTAL_TTC.search(line), TOTAL_HT.search(line), TVA.search(line), TOTAL.search(line)
+        if ttc or ht or tva or total:
+            nums = [n for n in amounts(line) if n[1]]
+            if not nums:
+                return
+            value = nums[-1][0]
+            if ttc:
+                q.total_ttc = value if q.total_ttc is None else max(q.total_ttc, value)
+            elif ht:
+                q.total_ht = value if q.total_ht is None else max(q.total_ht, value)
+            elif tva:
+                # one line per VAT rate adds up; a "Total TVA" line replaces them
+                q.tva = value if q.tva is None or total else q.tva + value
+            if q.total is None and total:
+                q.total = nums[0][0]
+            return
+        if SKIP.search(line):
+            return
+        item = parse_item(line, self.lot)
+        if item:
+            q.items.append(item)
+
+    def result(self):
+        return self.quote
@@ -0,0 +1,51 @@
+# ==============================
+# QuoteGuard – Incremental Audit Pipeline
+# ==============================
+# Streamlit re-runs the whole script on every widget change. The audit is
+# modelled as a chain of memoized stages:
+#     file -> extract (text + parsed fields) -> company
+#                                            -> fair price (x region) -> score -> views
+# Each stage remembers the key of the inputs it was last computed from, so a
+# language switch only rebuilds labels/charts and a region change only
+# re-prices; extraction and the SIRET lookup are skipped.
+
+import time
+
+from quoteguard.metrics import REGISTRY
+
+
+class Pipeline:
+    def __init__(self, store):
+        # store: any dict that survives reruns, e.g. st.session_state.setdefault("pipeline", {})
+        self.store = store
+        self.recomputed = set()
+        self.timings = {}       # seconds spent in each stage recomputed during this run
+
+    def cached(self, stage, key):
+        entry = self.store.get(stage)
+        return entry is not None and entry[0] == key
+
+    def get(self, stage, key, default=None):
+        entry = self.store.get(stage)
+        return entry[1] if entry is not None and entry[0] == key else default
+
+    def run(self, stage, key, fn, *args, **kwargs):
+        """Return fn(*args) for this key, reusing the last result if the key hasn't changed."""
+        entry = self.store.get(stage)
+        if entry is not None and entry[0] == key:
+            REGISTRY.inc("quoteguard_pipeline_total", 1, "Pipeline stage runs, reused or recomputed", stage=stage, result="reused")
+            return entry[1]
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        self.timings[stage] = time.perf_counter() - start
+        self.store[stage] = (key, value)
+        self.recomputed.add(stage)
+        REGISTRY.inc("quoteguard_pipeline_total", 1, "Pipeline stage runs, reused or recomputed", stage=stage, result="recomputed")
+        return value
+
+    def put(self, stage, key, value, seconds=None):
+        """Store a value computed elsewhere (e.g. by a background job) as if run() had produced it."""
+        if seconds is not None:
+            self.timings[stage] = seconds
+        self.store[stage] = (key, value)
+        self.recomputed.add(stage)
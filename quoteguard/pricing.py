@@ -0,0 +1,103 @@
+# ==============================
+# QuoteGuard – Price Catalog Matcher
+# ==============================
+# The price catalog lives in data/catalog.json (override with
+# QUOTEGUARD_CATALOG). Every keyword, synonym and plural is compiled once into
+# an Aho-Corasick automaton, so a quote is matched in a single pass over its
+# text whatever the size of the catalog.
+
+import json
+import os
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+CATALOG_PATH = os.environ.get("QUOTEGUARD_CATALOG", os.path.join(os.path.dirname(__file__), "data", "catalog.json"))
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    # lowercase, strip accents, collapse punctuation/whitespace runs to one space,
+    # padded so every keyword can be matched as " keyword " (whole words only)
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " " + _NON_WORD.sub(" ", text).strip() + " "
+
+
+def variants(keyword):
+    base = normalize(keyword).strip()
+    if not base:
+        return []
+    # French/English plurals: douches, chauffe-eaux, toilets
+    return [base, base + "s", base + "x"]
+
+
+class Matcher:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for idx, entry in enumerate(catalog):
+            for kw in entry["keywords"]:
+                for v in variants(kw):
+                    self._add(" " + v + " ", idx)
+        self._build()
+
+    def _add(self, pattern, idx):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = self._out[node] + (idx,)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def match(self, text):
+        """Return matched catalog entries, deduplicated by name, in catalog order."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = set()
+        node = 0
+        for ch in normalize(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                hits.update(out[node])
+        seen = set()
+        found = []
+        for idx in sorted(hits):
+            entry = self.catalog[idx]
+            if entry["name"] not in seen:
+                seen.add(entry["name"])
+                found.append(entry)
+        return found
+
+
+def load_catalog(path=CATALOG_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def get_matcher(path=CATALOG_PATH):
+    return Matcher(load_catalog(path))
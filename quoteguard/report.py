@@ -0,0 +1,128 @@
+# ==============================
+# QuoteGuard – Audit Report
+# ==============================
+# PDF reports are rendered on demand (when the user clicks download, or when
+# the batch CLI asks for them) and cached by their content. The static header
+# of each language is laid out once and cloned for every render.
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from quoteguard.metrics import REGISTRY, stage
+
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+_templates = {}
+_cache = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+
+
+def clean_text(text):
+    if not isinstance(text, str): text = str(text)
+    text = text.replace("€", "EUR").replace("•", "-").replace("’", "'").replace("…", "...")
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+
+def _template(t):
+    key = (t["title"], t["subtitle"])
+    tpl = _templates.get(key)
+    if tpl is None:
+        from fpdf import FPDF
+        tpl = FPDF()
+        tpl.add_page()
+        tpl.set_font("Arial", "B", 20)
+        tpl.cell(0, 10, clean_text(t["title"]), ln=True, align="C")
+        tpl.set_font("Arial", "I", 12)
+        tpl.cell(0, 10, clean_text(t["subtitle"]), ln=True, align="C")
+        tpl.line(10, 30, 200, 30)
+        tpl.ln(10)
+        # register the remaining fonts now so renders only look them up
+        tpl.set_font("Arial", "I", 8)
+        tpl.set_font("Arial", "", 12)
+        _templates[key] = tpl
+    return tpl
+
+
+def _clone(tpl):
+    # Shallow copy plus the containers FPDF mutates while rendering/outputting;
+    # ~10x cheaper than laying the header out again (and than deepcopy)
+    pdf = copy.copy(tpl)
+    pdf.pages = dict(tpl.pages)
+    pdf.fonts = {k: dict(v) for k, v in tpl.fonts.items()}
+    for attr in ("offsets", "page_links", "links", "images", "diffs", "font_files", "orientation_changes"):
+        setattr(pdf, attr, copy.copy(getattr(tpl, attr)))
+    return pdf
+
+
+def create_pdf(t, project, region, name, status, addr, price, fair, diff, risk, items):
+    pdf = _clone(_template(t))
+    
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, f"DATE: {datetime.now().strftime('%Y-%m-%d')}", ln=True)
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(0, 10, clean_text(f"Region: {region}"), ln=True)
+    pdf.cell(0, 10, clean_text(f"Company: {name} ({status})"), ln=True)
+    pdf.ln(5)
+    
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, "DETECTED ITEMS:", ln=True)
+    pdf.set_font("Arial", "", 10)
+    for i in items:
+        pdf.cell(0, 6, clean_text(f"- {i['name']}: {i['cost']:.0f} EUR"), ln=True)
+    pdf.ln(5)
+
+    pdf.set_fill_color(240, 240, 240)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, "FINANCIAL ANALYSIS", ln=True, fill=True)
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(100, 10, clean_text(t["metric_quote"]), border=1)
+    pdf.cell(0, 10, f"{price:,.2f} EUR", border=1, ln=True)
+    pdf.cell(100, 10, clean_text(t["metric_fair"]), border=1)
+    pdf.cell(0, 10, f"{fair:,.2f} EUR", border=1, ln=True)
+    pdf.ln(5)
+    
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, clean_text(f"VERDICT: {risk}"), ln=True, align="C")
+    
+    pdf.set_y(-30)
+    pdf.set_font("Arial", "I", 8)
+    pdf.multi_cell(0, 5, clean_text(t["disclaimer"]))
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def report_key(t, project, region, name, status, addr, price, fair, diff, risk, items):
+    # Everything printed on the report, plus the date it's stamped with
+    content = [t["title"], t["subtitle"], t["metric_quote"], t["metric_fair"], t["disclaimer"],
+               region, name, status, round(price, 2), round(fair, 2), risk,
+               [(i["name"], round(i["cost"])) for i in items], datetime.now().strftime("%Y-%m-%d")]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def render_report(t, project, region, name, status, addr, price, fair, diff, risk, items):
+    """create_pdf with a process-wide, size-bounded LRU cache in front of it."""
+    global _cache_bytes
+    args = (t, project, region, name, status, addr, price, fair, diff, risk, items)
+    key = report_key(*args)
+    with _lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+    REGISTRY.inc("quoteguard_report_cache_total", 1, "Report cache lookups", result="hit" if data is not None else "miss")
+    if data is not None:
+        return data
+
+    with stage("pdf_render"):
+        data = create_pdf(*args)
+    with _lock:
+        if key not in _cache:
+            _cache[key] = data
+            _cache_bytes += len(data)
+            while _cache_bytes > MAX_CACHE_BYTES and _cache:
+                _, old = _cache.popitem(last=False)
+                _cache_bytes -= len(old)
+    return data
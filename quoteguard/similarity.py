@@ -0,0 +1,192 @@
+# ==============================
+# QuoteGuard – Near-Duplicate Quote Index
+# ==============================
+# Contractors reissue the same devis with a new date or a nudged total. Each
+# quote's normalised text (numbers masked) is cut into word 3-shingles and
+# reduced to a 128-value MinHash signature. The signature is split into 16 LSH
+# bands of 8 rows; quotes sharing any band bucket become candidates, and only
+# those candidates are compared on their full signature. Lookups are a
+# handful of B-tree probes however many quotes are indexed.
+#
+# Everything lives on disk next to the audit store (QUOTEGUARD_DB), in two
+# compact tables: one 512-byte signature + a compressed field summary per
+# quote, and 16 (bucket, quote) integer pairs per quote. Nothing is held in
+# memory, so the index can grow to hundreds of thousands of quotes.
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+
+from quoteguard.pricing import normalize
+from quoteguard.store import DEFAULT_PATH
+
+NUM_PERM = 128
+BANDS = 16                  # 16 bands x 8 rows: ~95% recall at 0.8 similarity, ~6% candidates at 0.5
+THRESHOLD = 0.8             # estimated Jaccard similarity that counts as "the same quote"
+SHINGLE = 3
+CHUNK = 4096                # shingles hashed per numpy block, bounds the temporary matrix
+_PRIME = (1 << 31) - 1
+_DIGITS = re.compile(r"\d+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quote_signatures (
+    id          INTEGER PRIMARY KEY,
+    quote_hash  TEXT NOT NULL UNIQUE,
+    ts          REAL NOT NULL,
+    sig         BLOB NOT NULL,
+    fields      BLOB
+);
+CREATE TABLE IF NOT EXISTS quote_lsh (
+    bucket      INTEGER NOT NULL,
+    quote_id    INTEGER NOT NULL,
+    PRIMARY KEY (bucket, quote_id)
+) WITHOUT ROWID;
+"""
+
+
+def shingles(text):
+    """Word 3-shingles of the normalised text; digits are masked so dates, numbers and totals don't break a match."""
+    words = _DIGITS.sub("0", normalize(text)).split()
+    if len(words) < SHINGLE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def summarize(details, company=None):
+    """The fields kept for a quote: enough to reuse its company lookup and diff a later version against it."""
+    parsed = details.get("parsed") or {}
+    return {
+        "amount": details.get("amount"), "siret": details.get("siret"), "company": list(company) if company else None,
+        "total_ht": parsed.get("total_ht"), "tva": parsed.get("tva"), "total_ttc": parsed.get("total_ttc"),
+        "items": [[i["label"], i["total"]] for i in parsed.get("items", [])],
+    }
+
+
+def diff(old, new):
+    """Changes between two summaries: [(field, old, new)], with line items compared by label."""
+    changes = []
+    for field in ("amount", "total_ht", "tva", "total_ttc", "siret"):
+        if old.get(field) != new.get(field):
+            changes.append((field, old.get(field), new.get(field)))
+    before, after = dict(map(tuple, old.get("items", []))), dict(map(tuple, new.get("items", [])))
+    for label in before.keys() | after.keys():
+        if before.get(label) != after.get(label):
+            changes.append((label, before.get(label), after.get(label)))
+    return changes
+
+
+class Match:
+    def __init__(self, quote_hash, similarity, ts, fields):
+        self.quote_hash = quote_hash
+        self.similarity = similarity
+        self.ts = ts
+        self.fields = fields
+
+    def company_for(self, siret, max_age):
+        """The company lookup stored with the earlier version, if it is for this SIRET and recent enough."""
+        if not self.fields.get("company") or self.fields.get("siret") != siret or time.time() - self.ts > max_age:
+            return None
+        return tuple(self.fields["company"])
+
+
+class QuoteIndex:
+    def __init__(self, path=DEFAULT_PATH, num_perm=NUM_PERM, bands=BANDS, threshold=THRESHOLD, seed=1):
+        import numpy as np
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)[:, None]
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self.connect()) as db:
+            db.executescript(SCHEMA)
+
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self.connect()
+        return db
+
+    # ---------- SIGNATURES ----------
+    def signature(self, text):
+        """MinHash signature (num_perm uint32 values) of the quote text, or None if it has no words."""
+        import numpy as np
+        grams = shingles(text)
+        if not grams:
+            return None
+        hashes = np.fromiter((zlib.crc32(g.encode()) & _PRIME for g in grams), dtype=np.uint64, count=len(grams))
+        sig = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), CHUNK):
+            # (a*x + b) mod p; a, x < 2**31 so the product fits in uint64
+            block = (self._a * hashes[start:start + CHUNK] + self._b) % _PRIME
+            np.minimum(sig, block.min(axis=1), out=sig)
+        return sig.astype(np.uint32)
+
+    def buckets(self, sig):
+        # one signed 64-bit key per band, so all bands share a single index
+        raw = sig.tobytes()
+        size = self.rows * 4
+        return [int.from_bytes(hashlib.blake2b(bytes([band]) + raw[band * size:(band + 1) * size], digest_size=8).digest(), "big", signed=True)
+                for band in range(self.bands)]
+
+    # ---------- INDEX ----------
+    def add(self, quote_hash, sig, fields=None):
+        """Index one quote; a quote_hash already indexed keeps its first entry."""
+        blob = zlib.compress(json.dumps(fields, ensure_ascii=False).encode()) if fields is not None else None
+        db = self._db()
+        with db:
+            cur = db.execute("INSERT OR IGNORE INTO quote_signatures (quote_hash, ts, sig, fields) VALUES (?, ?, ?, ?)",
+                             (quote_hash, time.time(), sig.tobytes(), blob))
+            if cur.rowcount:
+                db.executemany("INSERT OR IGNORE INTO quote_lsh (bucket, quote_id) VALUES (?, ?)",
+                               [(b, cur.lastrowid) for b in self.buckets(sig)])
+
+    def query(self, sig, limit=5):
+        """Indexed quotes whose estimated similarity to sig is at least the threshold, best first."""
+        import numpy as np
+        keys = self.buckets(sig)
+        db = self._db()
+        rows = db.execute(f"""
+            SELECT s.quote_hash, s.ts, s.sig, s.fields FROM quote_signatures s
+            JOIN (SELECT quote_id FROM quote_lsh WHERE bucket IN ({', '.join('?' * len(keys))})
+                  GROUP BY quote_id ORDER BY COUNT(*) DESC LIMIT 50) c ON c.quote_id = s.id""", keys).fetchall()
+        matches = []
+        for quote_hash, ts, raw, blob in rows:
+            similarity = float(np.mean(np.frombuffer(raw, dtype=np.uint32) == sig))
+            if similarity >= self.threshold:
+                fields = json.loads(zlib.decompress(blob)) if blob else {}
+                matches.append(Match(quote_hash, similarity, ts, fields))
+        matches.sort(key=lambda m: (-m.similarity, -m.ts))
+        return matches[:limit]
+
+    def count(self):
+        return self._db().execute("SELECT COUNT(*) FROM quote_signatures").fetchone()[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = QuoteIndex()
+    return _index
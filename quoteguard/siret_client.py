@@ -0,0 +1,194 @@
+# ==============================
+# QuoteGuard – SIRET Verification Client
+# ==============================
+# Pooled, cached client for the recherche-entreprises API.
+# - keep-alive session with bounded retries/backoff (read timeouts are not retried)
+# - TTL cache for ACTIVE/CLOSED results, shorter TTL for "not found"
+# - concurrent lookups of the same SIRET share one HTTP request
+# - circuit breaker so a slow upstream can't stall every audit
+# - batch (threaded) and asyncio APIs for many SIRETs at once
+# Point QUOTEGUARD_REGISTRY_URL at a local stub server for testing.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_URL = os.environ.get("QUOTEGUARD_REGISTRY_URL", "https://recherche-entreprises.api.gouv.fr")
+UNKNOWN = ("Unknown", "CHECK", "")
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class TTLCache:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_after=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self.probing and time.monotonic() - self.opened_at >= self.reset_after:
+                # Half-open: let one probe through; other callers are refused until it reports,
+                # and a failed probe re-opens the circuit straight away
+                self.probing = True
+                return True
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            probe, self.probing = self.probing, False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if probe or self.failures >= self.failure_threshold:
+                    self.opened_at = time.monotonic()
+
+
+class SiretClient:
+    def __init__(self, base_url=DEFAULT_URL, timeout=(3.05, 5), ttl=24 * 3600, negative_ttl=3600,
+                 pool_size=20, retries=2, max_entries=10000, failure_threshold=5, reset_after=30.0):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(max_entries)
+        self.breaker = CircuitBreaker(failure_threshold, reset_after)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        # read=0: a request that timed out mid-response is not retried, so a hung registry
+        # costs one read timeout per lookup rather than one per attempt
+        retry = Retry(total=retries, read=0, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET"]), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @staticmethod
+    def parse(payload):
+        # The API returns {"results": [...]}; older/stub responses may be a bare list
+        results = payload.get("results", []) if isinstance(payload, dict) else payload
+        if not results:
+            return None
+        c = results[0]
+        name = c.get("nom_complet") or c.get("label") or "Unknown"
+        status = "ACTIVE" if c.get("etat_administratif") == "A" else "CLOSED"
+        etab = c.get("first_matching_etablissement") or (c.get("matching_etablissements") or [{}])[0] or {}
+        addr = etab.get("address") or etab.get("adresse") or (c.get("siege") or {}).get("adresse", "")
+        return name, status, addr
+
+    def _fetch(self, siret):
+        if not self.breaker.allow():
+            raise CircuitOpen(siret)
+        try:
+            r = self.session.get(f"{self.base_url}/search", params={"q": siret}, timeout=self.timeout)
+            r.raise_for_status()
+            result = self.parse(r.json())
+        except Exception:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True)
+        return result
+
+    def lookup(self, siret):
+        """Return (name, status, address); status is ACTIVE, CLOSED or CHECK when unverifiable."""
+        cached = self.cache.get(siret)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            fut = self._inflight.get(siret)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[siret] = Future()
+        if not leader:
+            try:
+                return fut.result()
+            except Exception:
+                return UNKNOWN
+
+        try:
+            found = self._fetch(siret)
+            result = found or UNKNOWN
+            self.cache.set(siret, result, self.ttl if found else self.negative_ttl)
+            fut.set_result(result)
+            return result
+        except Exception as e:
+            # Transport errors are not cached; the breaker decides when to try again
+            fut.set_exception(e)
+            return UNKNOWN
+        finally:
+            with self._lock:
+                self._inflight.pop(siret, None)
+
+    def lookup_many(self, sirets, max_workers=8):
+        """Verify many SIRETs concurrently; returns {siret: (name, status, address)}."""
+        unique = list(dict.fromkeys(sirets))
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as ex:
+            return dict(zip(unique, ex.map(self.lookup, unique)))
+
+    async def alookup(self, siret):
+        import asyncio
+        return await asyncio.to_thread(self.lookup, siret)
+
+    async def alookup_many(self, sirets, concurrency=8):
+        import asyncio
+        sem = asyncio.Semaphore(concurrency)
+        unique = list(dict.fromkeys(sirets))
+
+        async def one(s):
+            async with sem:
+                return s, await self.alookup(s)
+
+        return dict(await asyncio.gather(*(one(s) for s in unique)))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,168 @@
+# ==============================
+# QuoteGuard – Audit Store
+# ==============================
+# Embedded SQLite log of every audit (QUOTEGUARD_DB, default
+# ~/.local/share/quoteguard/audits.db). record() only enqueues; a background
+# thread writes queued audits in one transaction every few hundred ms, so the
+# page never waits on disk. Indexed for lookups by SIRET, region, date range
+# and score band.
+
+import atexit
+import json
+from contextlib import closing
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.environ.get("QUOTEGUARD_DB", os.path.join(os.path.expanduser("~"), ".local", "share", "quoteguard", "audits.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audits (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL NOT NULL,
+    session     TEXT,
+    quote_hash  TEXT,
+    siret       TEXT,
+    company     TEXT,
+    region      TEXT,
+    project     TEXT,
+    price       REAL,
+    fair        REAL,
+    score       INTEGER,
+    items       TEXT,
+    timings     TEXT
+);
+CREATE INDEX IF NOT EXISTS audits_ts ON audits (ts);
+CREATE INDEX IF NOT EXISTS audits_siret_ts ON audits (siret, ts);
+CREATE INDEX IF NOT EXISTS audits_region_ts ON audits (region, ts);
+CREATE INDEX IF NOT EXISTS audits_score ON audits (score, ts);
+CREATE INDEX IF NOT EXISTS audits_session_ts ON audits (session, ts);
+CREATE INDEX IF NOT EXISTS audits_quote_hash ON audits (quote_hash);
+"""
+
+COLUMNS = ("ts", "session", "quote_hash", "siret", "company", "region", "project", "price", "fair", "score", "items", "timings")
+JSON_COLUMNS = ("items", "timings")
+
+
+class AuditStore:
+    def __init__(self, path=DEFAULT_PATH, batch_size=200, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self.connect()) as db:
+            db.executescript(SCHEMA)
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._writer = threading.Thread(target=self._write_loop, name="quoteguard-audit-store", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.row_factory = sqlite3.Row
+        return db
+
+    def _reader(self):
+        # one read connection per thread; WAL lets reads run alongside the writer
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self.connect()
+        return db
+
+    # ---------- WRITES ----------
+    def record(self, audit):
+        """Queue one audit dict (keys from COLUMNS; missing ones are NULL). Returns immediately."""
+        row = dict(audit)
+        row.setdefault("ts", time.time())
+        for col in JSON_COLUMNS:
+            if row.get(col) is not None and not isinstance(row[col], str):
+                row[col] = json.dumps(row[col], ensure_ascii=False)
+        self._queue.put(tuple(row.get(c) for c in COLUMNS))
+
+    def _write_loop(self):
+        db = self.connect()
+        sql = f"INSERT INTO audits ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        stop = False
+        while not stop:
+            batch = []
+            waiters = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if stop or len(batch) >= self.batch_size:
+                        break
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    with db:
+                        db.executemany(sql, batch)
+                except sqlite3.Error:
+                    pass    # the audit itself already succeeded; don't take the writer down
+            for w in waiters:
+                w.set()
+        db.close()
+
+    def flush(self, timeout=10):
+        """Block until everything queued so far is written."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=10)
+
+    # ---------- QUERIES ----------
+    @staticmethod
+    def _where(siret=None, region=None, session=None, since=None, until=None, min_score=None, max_score=None):
+        clauses, args = [], []
+        for col, op, value in (("siret", "=", siret), ("region", "=", region), ("session", "=", session),
+                               ("ts", ">=", since), ("ts", "<", until), ("score", ">=", min_score), ("score", "<=", max_score)):
+            if value is not None:
+                clauses.append(f"{col} {op} ?")
+                args.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def query(self, limit=20, offset=0, **filters):
+        """Most recent audits first. Filters: siret, region, session, since/until (epoch s), min_score/max_score."""
+        where, args = self._where(**filters)
+        rows = self._reader().execute(f"SELECT * FROM audits{where} ORDER BY ts DESC LIMIT ? OFFSET ?", args + [limit, offset]).fetchall()
+        out = []
+        for r in rows:
+            d = dict(r)
+            for col in JSON_COLUMNS:
+                if d[col]: d[col] = json.loads(d[col])
+            out.append(d)
+        return out
+
+    def count(self, **filters):
+        where, args = self._where(**filters)
+        return self._reader().execute(f"SELECT COUNT(*) FROM audits{where}", args).fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AuditStore()
+    return _store
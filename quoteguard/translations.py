@@ -0,0 +1,136 @@
+# ==============================
+# QuoteGuard – UI & Report Translations
+# ==============================
+
+TRANSLATIONS = {
+    "English": {
+        "role": "National Verification Engine",
+        "bio": "Independent pricing verification using Smart Keyword Detection.",
+        "wa_button": "👉 Contact Expert",
+        "title": "QuoteGuard",
+        "subtitle": "Smart Renovation Audit & Price Check 🇫🇷",
+        "loc_label": "📍 Region / City",
+        "proj_label": "Project Category",
+        "upload_label": "Upload Quote (PDF, JPG, PNG)",
+        "prog_init": "Reading Document...",
+        "prog_check": "🔎 Detecting Items (OCR)...",
+        "prog_done": "✅ Smart Analysis Complete",
+        "prog_queued": "⏳ Waiting for a free analyser ({ahead} ahead)...",
+        "queue_full": "⏳ All analysers are busy. Your quote will start automatically in a moment.",
+        "job_failed": "The analysis failed. Please try uploading the quote again.",
+        "too_large": {"bytes": "This file is {value:g} MB; quotes up to {maximum:g} MB can be audited.",
+                      "pages": "This quote has {value:g} pages; quotes up to {maximum:g} pages can be audited.",
+                      "pixels": "This image is {value:g} megapixels; images up to {maximum:g} MP can be audited."},
+        "verdict": "Trust Score",
+        "metric_quote": "Quoted Price",
+        "metric_fair": "Smart Estimate",
+        "metric_markup": "vs Estimate",  # ADDED MISSING KEY
+        "chart_title": "Fairness Gauge",
+        "risk_high": "HIGH RISK",
+        "risk_safe": "FAIR PRICE",
+        "alert_title": "⚠️ Potential overcharge detected:",
+        "alert_btn": "🚨 Speak with an Expert",
+        "safe_title": "✅ Excellent Price! You are saving money.",
+        "safe_btn": "💬 Confirm with Expert",
+        "nego_title": "💡 Negotiation Strategy",
+        "nego_desc": "We found these items in your quote. Use this logic:",
+        "unknown": "❓ MANUAL CHECK REQ.",
+        "addr_missing": "Address not detected",
+        "active": "✅ LEGALLY ACTIVE",
+        "closed": "❌ COMPANY CLOSED",
+        "projects": {"General 🔨": "General 🔨", "Plumbing 🚿": "Plumbing 🚿", "Electricity ⚡": "Electricity ⚡"},
+        "disclaimer": "Estimates based on detected keywords and regional averages.",
+        "upgrade_title": "Upgrade to Expert Review",
+        "price_free": "Standard",
+        "price_paid": "Expert Audit",
+        "feat_1": "AI Item Detection",
+        "feat_2": "Regional Price Check",
+        "feat_4": "Human Expert Review",
+        "feat_5": "Negotiation Support",
+        "cta_free": "Current Plan",
+        "cta_paid": "Buy Audit - €29",
+        "rec": "RECOMMENDED",
+        "demo_btn": "⚡ Try Demo Quote",
+        "live_update": "LIVE MARKET: {delta} vs reference prices",
+        "live_update_none": "LIVE MARKET: learning from audits",
+        "hist_title": "🕒 Recent Scans",
+        "email_btn": "📧 Email Report",
+        "feedback": "Was this helpful?",
+        "stripe_url": "https://buy.stripe.com/test_12345",
+        "detected_items": "🔍 AI Detected Items:",
+        "quoted": "quoted",
+        "seen_before": "🔁 Seen before: {similarity:.0%} similar to a quote audited on {date}.",
+        "seen_same": "Same totals and line items as that version.",
+        "seen_changes": "What changed since that version",
+        "diff_fields": {"amount": "Total", "total_ht": "Total HT", "tva": "TVA", "total_ttc": "Total TTC", "siret": "SIRET"},
+        "compare_title": "🗺️ Same quote in every region",
+        "compare_cols": ["Fair price", "Difference", "Markup %", "Score"],
+        "match_title": "👷 Need a better price?",
+        "match_btn": "Get 3 Verified Quotes"
+    },
+    "Français": {
+        "role": "Expertise & Audit National",
+        "bio": "Vérification intelligente des prix via détection de mots-clés.",
+        "wa_button": "👉 Contacter Expert",
+        "title": "QuoteGuard",
+        "subtitle": "Audit Intelligent de Devis Travaux 🇫🇷",
+        "loc_label": "📍 Région / Ville",
+        "proj_label": "Catégorie du Projet",
+        "upload_label": "Analyser Devis (PDF, JPG, PNG)",
+        "prog_init": "Lecture du document...",
+        "prog_check": "🔎 Détection des travaux (OCR)...",
+        "prog_done": "✅ Analyse Intelligente Terminée",
+        "prog_queued": "⏳ En attente d'un analyseur libre ({ahead} devant vous)...",
+        "queue_full": "⏳ Tous les analyseurs sont occupés. Votre devis démarrera automatiquement dans un instant.",
+        "job_failed": "L'analyse a échoué. Merci de téléverser le devis à nouveau.",
+        "too_large": {"bytes": "Ce fichier fait {value:g} Mo ; la limite est de {maximum:g} Mo.",
+                      "pages": "Ce devis compte {value:g} pages ; la limite est de {maximum:g} pages.",
+                      "pixels": "Cette image fait {value:g} mégapixels ; la limite est de {maximum:g} MP."},
+        "verdict": "Score de Confiance",
+        "metric_quote": "Montant du Devis",
+        "metric_fair": "Estimation Intelligente",
+        "metric_markup": "Écart vs Est.",  # ADDED MISSING KEY
+        "chart_title": "Jauge de Confiance",
+        "risk_high": "RISQUE ÉLEVÉ",
+        "risk_safe": "PRIX CORRECT",
+        "alert_title": "⚠️ Écart critique détecté :",
+        "alert_btn": "🚨 Parler à un Expert",
+        "safe_title": "✅ Excellent Prix ! Vous économisez.",
+        "safe_btn": "💬 Valider ce devis",
+        "nego_title": "💡 Stratégie de Négociation",
+        "nego_desc": "Voici les éléments détectés. Utilisez cet argumentaire :",
+        "unknown": "❓ VÉRIFICATION MANUELLE",
+        "addr_missing": "Adresse non détectée",
+        "active": "✅ SOCIÉTÉ ACTIVE (INSEE)",
+        "closed": "❌ SOCIÉTÉ RADIÉE / FERMÉE",
+        "projects": {"General 🔨": "Rénovation Globale 🔨", "Plumbing 🚿": "Plomberie 🚿", "Electricity ⚡": "Électricité ⚡"},
+        "disclaimer": "Estimations basées sur les mots-clés détectés et moyennes régionales.",
+        "upgrade_title": "Passer à l'Audit Expert",
+        "price_free": "Standard",
+        "price_paid": "Audit Expert",
+        "feat_1": "Détection IA des Travaux",
+        "feat_2": "Vérification Prix Régional",
+        "feat_4": "Revue par un Expert Humain",
+        "feat_5": "Assistance Négociation",
+        "cta_free": "Plan Actuel",
+        "cta_paid": "Acheter Audit - 29€",
+        "rec": "RECOMMANDÉ",
+        "demo_btn": "⚡ Essayer la Démo",
+        "live_update": "MARCHÉ EN DIRECT : {delta} vs prix de référence",
+        "live_update_none": "MARCHÉ EN DIRECT : apprentissage en cours",
+        "hist_title": "🕒 Historique Récent",
+        "email_btn": "📧 Envoyer par Email",
+        "feedback": "Cet audit a-t-il été utile ?",
+        "stripe_url": "https://buy.stripe.com/test_12345",
+        "detected_items": "🔍 Travaux Détectés par l'IA :",
+        "quoted": "devis",
+        "seen_before": "🔁 Déjà vu : similaire à {similarity:.0%} à un devis audité le {date}.",
+        "seen_same": "Mêmes totaux et mêmes lignes que cette version.",
+        "seen_changes": "Ce qui a changé depuis cette version",
+        "diff_fields": {"amount": "Total", "total_ht": "Total HT", "tva": "TVA", "total_ttc": "Total TTC", "siret": "SIRET"},
+        "compare_title": "🗺️ Le même devis dans chaque région",
+        "compare_cols": ["Prix juste", "Écart", "Marge %", "Score"],
+        "match_title": "👷 Besoin d'un meilleur prix ?",
+        "match_btn": "Recevoir 3 Devis Vérifiés"
+    }
+}